@@ -1,10 +1,42 @@
+import pytest
+
+from pgfutils import _config_reset
+
+
 def pytest_itemcollected(item):
     """Use the test docstring (if available) as the node ID.
 
     The node ID is printed for each test; by default this is in the format
     filename::classname::function. If available, use the docstring instead as
-    this is more readable.
+    this is more readable. For parametrized tests, the ID of the parameters is added.
+
+    The filename is kept as the first part of the ID. pytest-xdist uses it to send all
+    the tests from one file to the same worker (--dist loadfile), which stops tests
+    building figures in a shared directory from running at the same time.
 
     """
     node = item.obj
-    item._nodeid = node.__doc__.strip() if node.__doc__ else node.__name__
+    nodeid = node.__doc__.strip() if node.__doc__ else node.__name__
+
+    # Parametrized tests share a docstring, so add the parameter ID to tell them apart.
+    callspec = getattr(item, "callspec", None)
+    if callspec is not None:
+        nodeid = f"{nodeid} [{callspec.id}]"
+
+    filename = item.nodeid.split("::", 1)[0]
+    item._nodeid = f"{filename}::{nodeid}"
+
+
+@pytest.fixture(autouse=True)
+def reset_config():
+    """Start each test with the default configuration.
+
+    Each test is also run within its own Matplotlib rcParams context, so any changes
+    made by setup_figure() are undone once the test finishes.
+
+    """
+    import matplotlib
+
+    _config_reset()
+    with matplotlib.rc_context():
+        yield
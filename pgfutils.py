@@ -46,9 +46,13 @@ __version__ = "1.8.0.dev0"
 
 import ast
 import configparser
+import functools
 import importlib.abc
+import importlib.util
 import inspect
 import io
+import itertools
+import mmap
 import os
 import pathlib
 import re
@@ -71,9 +75,6 @@ class ColorError(ValueError):
 class PgfutilsParser(configparser.ConfigParser):
     """Custom configuration parser with Matplotlib dimension and color support."""
 
-    # Regular expression to parse a dimension into size and (optional) unit.
-    _dimre = re.compile(r"^\s*(?P<size>\d+(?:\.\d*)?)\s*(?P<unit>.+?)?\s*$")
-
     # Conversion factors (divisors) to go from the given unit to inches.
     _dimconv = {
         "cm": 2.54,
@@ -182,39 +183,7 @@ class PgfutilsParser(configparser.ConfigParser):
             The dimension is empty or not recognised.
 
         """
-        # Need a string.
-        if dim is None:
-            raise DimensionError("Cannot be set to an empty value.")
-
-        # Check for an empty string.
-        dim = dim.strip().lower()
-        if not dim:
-            raise DimensionError("Cannot be set to an empty value.")
-
-        # Try to parse it.
-        m = self._dimre.match(dim)
-        if not m:
-            raise DimensionError(f"Could not parse {dim} as a dimension.")
-
-        # Pull out the pieces.
-        groups = m.groupdict()
-        size = float(groups["size"])
-        unit = groups.get("unit", "") or ""
-        unit = unit.lower()
-
-        # No unit: already in inches.
-        if not unit:
-            return size
-
-        # Pick out the divisor to convert into inches.
-        factor = self._dimconv.get(unit, None)
-
-        # Unknown unit.
-        if factor is None:
-            raise DimensionError(f"Unknown unit {unit}.")
-
-        # Do the conversion.
-        return size / factor
+        return _parse_dimension(dim)
 
     def getdimension(self, section, option, **kwargs):
         """Return a configuration entry as a dimension in inches.
@@ -355,9 +324,10 @@ class PgfutilsParser(configparser.ConfigParser):
             raise ValueError(f"Unknown tracking type {type}.")
 
         # If we can compute a relative path, it must be within the directory.
-        fn = pathlib.Path(fn).resolve()
+        cwd = os.getcwd()
+        fn = _resolve_path(fn, cwd)
         for path in paths:
-            path = pathlib.Path(path).resolve()
+            path = _resolve_path(path, cwd)
             try:
                 fn.relative_to(path)
             except ValueError:
@@ -372,51 +342,135 @@ class PgfutilsParser(configparser.ConfigParser):
 _config = PgfutilsParser()
 
 
+# Default configuration values. The configuration is reset to these before each figure
+# is set up.
+_config_defaults = {
+    "tex": {
+        "engine": "xelatex",
+        "text_width": "345 points",
+        "text_height": "550 points",
+        "marginpar_width": "65 points",
+        "marginpar_sep": "11 points",
+        "num_columns": "1",
+        "columnsep": "10 points",
+    },
+    "pgfutils": {
+        "preamble": "",
+        "preamble_substitute": "false",
+        "font_family": "serif",
+        "font_name": "",
+        "font_size": "10",
+        "legend_font_size": "10",
+        "line_width": "1",
+        "axes_line_width": "0.6",
+        "legend_border_width": "0.6",
+        "legend_border_color": "(0.8, 0.8, 0.8)",
+        "legend_background": "(1, 1, 1)",
+        "legend_opacity": 0.8,
+        "figure_background": "",
+        "axes_background": "white",
+        "extra_tracking": "",
+        "environment": "",
+    },
+    "paths": {
+        "data": ".",
+        "pythonpath": "",
+        "extra_imports": "",
+    },
+    "rcParams": {},
+    "postprocessing": {
+        "fix_raster_paths": "true",
+        "tikzpicture": "false",
+    },
+}
+
+
 def _config_reset():
     """Internal: reset the configuration to the default state."""
     global _config
     _config.clear()
-    _config.read_dict(
-        {
-            "tex": {
-                "engine": "xelatex",
-                "text_width": "345 points",
-                "text_height": "550 points",
-                "marginpar_width": "65 points",
-                "marginpar_sep": "11 points",
-                "num_columns": "1",
-                "columnsep": "10 points",
-            },
-            "pgfutils": {
-                "preamble": "",
-                "preamble_substitute": "false",
-                "font_family": "serif",
-                "font_name": "",
-                "font_size": "10",
-                "legend_font_size": "10",
-                "line_width": "1",
-                "axes_line_width": "0.6",
-                "legend_border_width": "0.6",
-                "legend_border_color": "(0.8, 0.8, 0.8)",
-                "legend_background": "(1, 1, 1)",
-                "legend_opacity": 0.8,
-                "figure_background": "",
-                "axes_background": "white",
-                "extra_tracking": "",
-                "environment": "",
-            },
-            "paths": {
-                "data": ".",
-                "pythonpath": "",
-                "extra_imports": "",
-            },
-            "rcParams": {},
-            "postprocessing": {
-                "fix_raster_paths": "true",
-                "tikzpicture": "false",
-            },
-        }
-    )
+    _config.read_dict(_config_defaults)
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_dimension(dim):
+    """Internal: convert a dimension string to inches.
+
+    This implements PgfutilsParser.parsedimension(). The same handful of dimensions are
+    parsed many times, so successful conversions are cached; errors are not.
+
+    Parameters
+    ----------
+    dim : str
+        The dimension to parse.
+
+    Returns
+    -------
+    float
+
+    """
+    # Need a string.
+    if dim is None:
+        raise DimensionError("Cannot be set to an empty value.")
+
+    # Check for an empty string.
+    dim = dim.strip().lower()
+    if not dim:
+        raise DimensionError("Cannot be set to an empty value.")
+
+    # The size is a run of digits with an optional decimal point followed by
+    # (optionally) more digits. Scan along to find where it ends.
+    end = len(dim)
+    i = 0
+    while i < end and dim[i].isdecimal():
+        i += 1
+    if i == 0:
+        raise DimensionError(f"Could not parse {dim} as a dimension.")
+    if i < end and dim[i] == ".":
+        i += 1
+        while i < end and dim[i].isdecimal():
+            i += 1
+
+    # Everything after it is the unit.
+    size = float(dim[:i])
+    unit = dim[i:].lstrip()
+
+    # No unit: already in inches.
+    if not unit:
+        return size
+
+    # Pick out the divisor to convert into inches.
+    factor = PgfutilsParser._dimconv.get(unit, None)
+
+    # Unknown unit.
+    if factor is None:
+        raise DimensionError(f"Unknown unit {unit}.")
+
+    # Do the conversion.
+    return size / factor
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_path(fn, cwd):
+    """Internal: get the absolute resolved form of a path.
+
+    The results are cached as the same files and directories are resolved many times
+    while tracking.
+
+    Parameters
+    ----------
+    fn : path-like
+        The path to resolve.
+    cwd : str
+        The current working directory. This is part of the cache key as relative paths
+        resolve differently if the working directory changes.
+
+    Returns
+    -------
+    pathlib.Path
+
+    """
+    return pathlib.Path(cwd, fn).resolve()
 
 
 def _relative_if_subdir(fn):
@@ -434,13 +488,36 @@ def _relative_if_subdir(fn):
         absolute path otherwise.
 
     """
-    fn = pathlib.Path(fn).resolve()
+    cwd = os.getcwd()
+    fn = _resolve_path(fn, cwd)
     try:
-        return fn.relative_to(pathlib.Path.cwd())
+        return fn.relative_to(cwd)
     except ValueError:
         return fn
 
 
+def _is_raster_image(name):
+    """Internal: check if a filename is a rasterised part of a figure.
+
+    The PGF backend saves these as PNGs with names of the form <figure>-img<N>.png.
+
+    Parameters
+    ----------
+    name : str
+        The filename to check.
+
+    Returns
+    -------
+    Boolean
+
+    """
+    if not name.endswith(".png"):
+        return False
+    i = name.rfind("-img")
+    digits = i + 4
+    return i > 0 and name[digits:-4].isdecimal()
+
+
 def _file_tracker(to_wrap):
     """Internal: install an opened file tracker.
 
@@ -466,8 +543,6 @@ def _file_tracker(to_wrap):
     """
     global _config
 
-    import functools
-
     @functools.wraps(to_wrap)
     def wrapper(*args, **kwargs):
         # Defer opening to the real function.
@@ -490,7 +565,7 @@ def _file_tracker(to_wrap):
         if file.writable():
             # Does it match the filename pattern used by the PGF backend for rasterised
             # parts of the image being saved as PNGs?
-            if re.match(r"^.+-img\d+.png$", file.name):
+            if _is_raster_image(file.name):
                 _file_tracker.filenames.add(("w", _relative_if_subdir(file.name)))
 
         # Should always be readable in this case, but check anyway.
@@ -544,6 +619,94 @@ class ImportTracker(importlib.abc.MetaPathFinder):
         return spec
 
 
+class PostImportHook(importlib.abc.MetaPathFinder):
+    """Import finder which calls a function once a given module has been imported.
+
+    Looking for the module (e.g., with importlib.util.find_spec()) does not trigger the
+    hook. It removes itself from sys.meta_path once the module has actually been
+    executed, so it has no further cost after that.
+
+    """
+
+    def __init__(self, fullname, callback):
+        super().__init__()
+        self.fullname = fullname
+        self.callback = callback
+        self._searching = False
+
+    def find_spec(self, fullname, path, target=None):
+        # Other finders (such as ImportTracker) may search the meta path again while we
+        # are asking them for the spec; don't wrap the loader twice.
+        if fullname != self.fullname or self._searching:
+            return None
+
+        # Ask the other finders for the real spec.
+        self._searching = True
+        try:
+            for finder in list(sys.meta_path):
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._searching = False
+
+        if spec.loader is None:
+            return spec
+
+        # Run the callback after the real loader has executed the module.
+        spec.loader = _PostImportLoader(spec.loader, self)
+        return spec
+
+    def finished(self, module):
+        """Unhook and call the callback once the module has been executed."""
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+        self.callback(module)
+
+
+class _PostImportLoader(importlib.abc.Loader):
+    """Internal: loader which tells a hook when another loader has finished."""
+
+    def __init__(self, loader, hook):
+        self._loader = loader
+        self._hook = hook
+
+    def __getattr__(self, name):
+        # Anything else (e.g., resource readers) comes from the real loader.
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._loader.exec_module(module)
+        self._hook.finished(module)
+
+
+def _when_imported(fullname, callback):
+    """Internal: call a function with a module once it has been imported.
+
+    If the module has already been imported, the function is called immediately.
+
+    Parameters
+    ----------
+    fullname : str
+        The full name of the module.
+    callback : callable
+        The function to call. It is given the module object as its only argument.
+
+    """
+    module = sys.modules.get(fullname)
+    if module is not None:
+        callback(module)
+    else:
+        sys.meta_path.insert(0, PostImportHook(fullname, callback))
+
+
 def _install_standard_file_trackers():
     """Internal: install standard file trackers in likely locations.
 
@@ -581,42 +744,51 @@ def _install_extra_file_trackers(trackers):
     for tracker in trackers:
         tracker = tracker.strip().lower()
 
-        # netCDF4 data storage.
+        # netCDF4 data storage. Rather than importing it here, which would be wasted
+        # if the script never uses it, the classes are wrapped when it is imported.
         if tracker == "netcdf4":
-            import netCDF4
+            _when_imported("netCDF4", _track_netcdf4)
+
+        else:
+            raise ValueError(f"Unknown extra tracker {tracker}.")
 
-            # Wrap the Dataset class to modify its initialiser to track read files. The
-            # class is part of the compiled extension so we can't just override the
-            # initialiser.
-            class PgfutilsTrackedDataset(netCDF4.Dataset):
-                def __init__(self, filename, mode="r", **kwargs):
-                    super().__init__(filename, mode=mode, **kwargs)
-                    if mode == "r":
-                        _file_tracker.filenames.add(
-                            ("r", _relative_if_subdir(filename))
-                        )
 
-            netCDF4.Dataset = PgfutilsTrackedDataset
+def _track_netcdf4(netCDF4):
+    """Internal: wrap the netCDF4 dataset classes to track the files they read.
 
-            # Same deal for the MFDataset (multiple files read as one dataset).
-            class PgfutilsTrackedMFDataset(netCDF4.MFDataset):
-                def __init__(self, files, *args, **kwargs):
-                    super().__init__(files, *args, **kwargs)
+    Parameters
+    ----------
+    netCDF4 : module
+        The imported netCDF4 module.
+
+    """
 
-                    # Single string: glob pattern to expand.
-                    if isinstance(files, str):
-                        import glob
+    # Wrap the Dataset class to modify its initialiser to track read files. The class
+    # is part of the compiled extension so we can't just override the initialiser.
+    class PgfutilsTrackedDataset(netCDF4.Dataset):
+        def __init__(self, filename, mode="r", **kwargs):
+            super().__init__(filename, mode=mode, **kwargs)
+            if mode == "r":
+                _file_tracker.filenames.add(("r", _relative_if_subdir(filename)))
 
-                        files = glob.glob(files)
+    netCDF4.Dataset = PgfutilsTrackedDataset
 
-                    # And track them all.
-                    for fn in files:
-                        _file_tracker.filenames.add(("r", _relative_if_subdir(fn)))
+    # Same deal for the MFDataset (multiple files read as one dataset).
+    class PgfutilsTrackedMFDataset(netCDF4.MFDataset):
+        def __init__(self, files, *args, **kwargs):
+            super().__init__(files, *args, **kwargs)
 
-            netCDF4.MFDataset = PgfutilsTrackedMFDataset
+            # Single string: glob pattern to expand.
+            if isinstance(files, str):
+                import glob
 
-        else:
-            raise ValueError(f"Unknown extra tracker {tracker}.")
+                files = glob.glob(files)
+
+            # And track them all.
+            rel = _relative_if_subdir
+            _file_tracker.filenames.update(("r", rel(fn)) for fn in files)
+
+    netCDF4.MFDataset = PgfutilsTrackedMFDataset
 
 
 def add_dependencies(*args):
@@ -634,8 +806,7 @@ def add_dependencies(*args):
         project.
 
     """
-    for fn in args:
-        _file_tracker.filenames.add(("r", pathlib.Path(fn)))
+    _file_tracker.filenames.update(("r", pathlib.Path(fn)) for fn in args)
 
 
 def _list_opened_files():
@@ -654,6 +825,131 @@ def _list_opened_files():
     return sorted(_file_tracker.filenames)
 
 
+@functools.lru_cache(maxsize=None)
+def _creator_suffix(eol):
+    """Internal: get the version information added to the creator line of a figure.
+
+    Matplotlib is not imported until a figure is set up, so this is built on first use
+    and then cached.
+
+    Parameters
+    ----------
+    eol : bytes
+        The line terminator used in the figure.
+
+    Returns
+    -------
+    bytes
+        The encoded suffix, up to and including the label of the script path.
+
+    """
+    from matplotlib import __version__ as mpl_version
+
+    suffix = f" v{mpl_version}, matplotlib-pgfutils v{__version__}".encode()
+    return suffix + eol + b"%%  Script: "
+
+
+def _copy_remainder(mm, infile, outfile):
+    """Internal: copy the rest of a memory-mapped file to an output file.
+
+    On Linux, the kernel is asked to copy the data directly between the two files. If
+    this is not available (or fails), the data is written from the memory map instead.
+
+    Parameters
+    ----------
+    mm : mmap.mmap
+        The memory map of the input file. Everything from its current position onwards
+        is copied.
+    infile : file object
+        The file the memory map was created from.
+    outfile : file object
+        The binary file to copy the data to.
+
+    """
+    offset = mm.tell()
+    size = len(mm)
+
+    if sys.platform.startswith("linux"):
+        outfile.flush()
+        try:
+            while offset < size:
+                sent = os.sendfile(
+                    outfile.fileno(), infile.fileno(), offset, size - offset
+                )
+                if not sent:
+                    break
+                offset += sent
+        except OSError:
+            pass
+
+    if offset < size:
+        with memoryview(mm) as data:
+            outfile.write(data[offset:])
+
+
+# Patterns used when postprocessing the body of a figure.
+_raster_path_re = re.compile(rb"(\\(?:pgfimage|includegraphics)(?:\[.+?\])?{)(.+?)}")
+_pgfpicture_re = re.compile(rb"\\(begin|end){pgfpicture}")
+
+# Approximate size of the chunks the postprocessed body is written in.
+_pp_chunk_size = 1 << 20
+
+
+def _pp_raster(line, repl):
+    """Internal: add a directory prefix to any raster images included in a line.
+
+    Parameters
+    ----------
+    line : bytes
+        The line to process.
+    repl : bytes
+        The replacement for the image inclusion pattern.
+
+    Returns
+    -------
+    bytes
+        The processed line.
+
+    """
+    return _raster_path_re.sub(repl, line)
+
+
+def _pp_tikz(line):
+    """Internal: change any pgfpicture environments in a line to tikzpicture.
+
+    Parameters
+    ----------
+    line : bytes
+        The line to process.
+
+    Returns
+    -------
+    bytes
+        The processed line.
+
+    """
+    return _pgfpicture_re.sub(rb"\\\1{tikzpicture}", line)
+
+
+def _pp_both(line, repl):
+    """Internal: apply both the raster path and tikzpicture postprocessing to a line.
+
+    Parameters
+    ----------
+    line : bytes
+        The line to process.
+    repl : bytes
+        The replacement for the image inclusion pattern.
+
+    Returns
+    -------
+    bytes
+        The processed line.
+
+    """
+    return _pgfpicture_re.sub(rb"\\\1{tikzpicture}", _raster_path_re.sub(repl, line))
+
+
 # If the script has been run in an interactive mode (currently, if it is running under
 # IPython in a mode with an event loop) then we will display the figure in the save()
 # call rather than saving it.  Interactivity is tested each time setup_figure() is
@@ -909,23 +1205,38 @@ def save(figure=None):
     """
     global _config, _interactive
 
-    from matplotlib import __version__ as mpl_version, pyplot as plt
+    from matplotlib import pyplot as plt
 
     # Get the current figure if needed.
     if figure is None:
         figure = plt.gcf()
 
+    # Local cache of the configuration sections used while saving.
+    pgfutils_cfg = _config["pgfutils"]
+    pp_cfg = _config["postprocessing"]
+
+    # Legend properties, converted the first time they are needed.
+    legend_style = None
+
     # Go through and fix up a few little quirks on the axes within this figure.
     for axes in figure.get_axes():
         # There are no rcParams for the legend properties. Go through and set these
         # directly before we save.
         legend = axes.get_legend()
         if legend:
+            if legend_style is None:
+                legend_style = (
+                    pgfutils_cfg.getfloat("legend_border_width"),
+                    pgfutils_cfg.getfloat("legend_opacity"),
+                    pgfutils_cfg.getcolor("legend_border_color"),
+                    pgfutils_cfg.getcolor("legend_background"),
+                )
+            linewidth, alpha, ec, fc = legend_style
             frame = legend.get_frame()
-            frame.set_linewidth(_config["pgfutils"].getfloat("legend_border_width"))
-            frame.set_alpha(_config["pgfutils"].getfloat("legend_opacity"))
-            frame.set_ec(_config["pgfutils"].getcolor("legend_border_color"))
-            frame.set_fc(_config["pgfutils"].getcolor("legend_background"))
+            frame.set_linewidth(linewidth)
+            frame.set_alpha(alpha)
+            frame.set_ec(ec)
+            frame.set_fc(fc)
 
         # Some PDF viewers show white lines through vector colorbars. This is a bug in
         # the viewers, but can be worked around by forcing the edge of the patches in
@@ -943,14 +1254,19 @@ def save(figure=None):
         # collections (e.g., scatter plots), and contour plot lines (the roundabout
         # _current_image way -- there doesn't appear to be any other reference from the
         # axes to the QuadContourSet object).
-        colorbars = set()
-        colorbars.update(im.colorbar for im in axes.images if im.colorbar)
-        colorbars.update(coll.colorbar for coll in axes.collections if coll.colorbar)
-        if axes._current_image and axes._current_image.colorbar:
-            colorbars.add(axes._current_image.colorbar)
+        # These are deduplicated by identity in a single pass.
+        current = axes._current_image
+        colorbars = {}
+        for cb in itertools.chain(
+            (im.colorbar for im in axes.images),
+            (coll.colorbar for coll in axes.collections),
+            (current.colorbar,) if current else (),
+        ):
+            if cb:
+                colorbars.setdefault(id(cb), cb)
 
         # And process them.
-        for cb in colorbars:
+        for cb in colorbars.values():
             if not cb.solids:
                 continue
             # Ignore rasterized or transparent colorbars.
@@ -998,89 +1314,111 @@ def save(figure=None):
             with open(dest, "w") as f:
                 f.write(files)
 
-    # List of all postprocessing functions we are running on this figure. Each should
-    # take in a single line as a string, and return the line with any required
-    # modifications.
-    pp_funcs = []
-
     # Local cache of postprocessing options.
-    fix_raster_paths = _config["postprocessing"].getboolean("fix_raster_paths")
-    tikzpicture = _config["postprocessing"].getboolean("tikzpicture")
+    fix_raster_paths = pp_cfg.getboolean("fix_raster_paths")
+    tikzpicture = pp_cfg.getboolean("tikzpicture")
 
-    # Add the appropriate directory prefix to all raster images
-    # included via \pgfimage.
+    # Add the appropriate directory prefix to all raster images included via
+    # \pgfimage. This is only needed if the figure is not in the top-level directory.
+    repl = None
     if fix_raster_paths:
         figdir = figname.parent
-
-        # Only apply this if the figure is not in the top-level directory.
         if not figdir.samefile("."):
-            prefix = figdir.relative_to(pathlib.Path.cwd())
-            expr = re.compile(r"(\\(?:pgfimage|includegraphics)(?:\[.+?\])?{)(.+?)}")
-            repl = rf"\1{prefix}/\2}}"
-            pp_funcs.append(lambda s: re.sub(expr, repl, s))
-
-    # Use the tikzpicture environment rather than pgfpicture.
-    if tikzpicture:
-        expr = re.compile(r"\\(begin|end){pgfpicture}")
-        repl = r"\\\1{tikzpicture}"
-        pp_funcs.append(lambda s: re.sub(expr, repl, s))
-
-    # Postprocess the figure, moving it into the final destination.
-    with open(mpname, "r") as infile, open(figname, "w") as outfile:
-        # Make some modifications to the header.
-        line = infile.readline()
-        while line[0] == "%":
+            prefix = str(figdir.relative_to(pathlib.Path.cwd())).encode()
+            repl = rb"\1" + prefix + rb"/\2}"
+
+    # Pick the function to process each line of the body with. This takes in a single
+    # line as bytes and returns it with any required modifications, or is None if the
+    # body can be copied unchanged.
+    if repl is not None and tikzpicture:
+        process = functools.partial(_pp_both, repl=repl)
+    elif repl is not None:
+        process = functools.partial(_pp_raster, repl=repl)
+    elif tikzpicture:
+        process = _pp_tikz
+    else:
+        process = None
+
+    # Postprocess the figure, moving it into the final destination. Matplotlib always
+    # writes the figure as UTF-8 so we can work on the raw bytes rather than decoding
+    # and re-encoding every line. Memory mapping the input means the lines are read
+    # straight from the page cache rather than being copied through the IO stack.
+    with open(mpname, "rb") as infile, mmap.mmap(
+        infile.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm, open(figname, "wb") as outfile:
+        # Matplotlib writes the figure in text mode, so the lines end with the native
+        # line terminator of the platform it was saved on. Use the same terminator for
+        # any lines we modify or add so the output is consistent.
+        line = mm.readline()
+        eol = b"\r\n" if line.endswith(b"\r\n") else b"\n"
+
+        # Make some modifications to the header. The replacement text is built once
+        # up front so each modified line takes a single write.
+        creator_suffix = _creator_suffix(eol) + str(script.resolve()).encode() + eol
+        input_line = f"%%   \\input{{{figname}}}".encode() + eol
+
+        # Lines to modify are identified by the first word after the comment marker.
+        # Each handler takes the original line and returns its replacement. Every
+        # directive only appears once, so handlers are removed once they have fired.
+        handlers = {
             # Update the creator line to include pgfutils version, and add a line with
             # the path of the script that created the figure.
-            if "Creator:" in line:
-                outfile.write(line[:-1])
-                outfile.write(" v")
-                outfile.write(mpl_version)
-                outfile.write(", matplotlib-pgfutils v")
-                outfile.write(__version__)
-                outfile.write("\n%%  Script: ")
-                outfile.write(str(script.resolve()))
-                outfile.write("\n")
-
+            b"Creator:": lambda line: line.rstrip(b"\r\n") + creator_suffix,
             # Update the \input instructions.
-            elif r"\input{<filename>.pgf}" in line:
-                outfile.write("%%   \\input{")
-                outfile.write(str(figname))
-                outfile.write("}\n")
-
-            # If we're changing the figure to use the tikzpicture environment, we also
-            # need to update the required package.
-            elif tikzpicture and r"\usepackage{pgf}" in line:
-                outfile.write("%%    \\usepackage{tikz}\n")
-
-            # If we're fixing the paths to rasterised images, we can remove the
-            # instructions about using the import package.
-            elif fix_raster_paths and line.startswith(
-                "%% Figures using additional raster"
+            rb"\input{<filename>.pgf}": lambda line: input_line,
+        }
+
+        # If we're changing the figure to use the tikzpicture environment, we also
+        # need to update the required package.
+        if tikzpicture:
+            tikz_line = b"%%    \\usepackage{tikz}" + eol
+            handlers[rb"\usepackage{pgf}"] = lambda line: tikz_line
+
+        # If we're fixing the paths to rasterised images, we can remove the
+        # instructions about using the import package.
+        strip_import = fix_raster_paths
+
+        while line.startswith(b"%"):
+            words = line[2:].split(None, 1) if handlers else None
+            handler = handlers.pop(words[0], None) if words else None
+            if handler is not None:
+                outfile.write(handler(line))
+
+            elif strip_import and line.startswith(
+                b"%% Figures using additional raster"
             ):
-                while r"\import{<path to file>}" not in line:
-                    line = infile.readline()
+                while rb"\import{<path to file>}" not in line:
+                    line = mm.readline()
 
                 # Discard blank line after the statement too.
-                infile.readline()
+                mm.readline()
+                strip_import = False
 
             # Copy the original line.
             else:
                 outfile.write(line)
 
             # Next line of header.
-            line = infile.readline()
-
-        # Post-process and write the first line after the header.
-        for func in pp_funcs:
-            line = func(line)
-        outfile.write(line)
+            line = mm.readline()
 
-        # Apply the postprocessing to the remainder of the file.
-        for line in infile:
-            for func in pp_funcs:
-                line = func(line)
+        # If the body of the figure doesn't need any changes, copy it straight across.
+        if process is None:
             outfile.write(line)
+            _copy_remainder(mm, infile, outfile)
+
+        # Otherwise process the remainder of the file, starting with the first line
+        # after the header. The processed lines are collected into a buffer which is
+        # written out in large chunks rather than a line at a time.
+        else:
+            buf = bytearray()
+            append = buf.extend
+            while line:
+                append(process(line))
+                if len(buf) > _pp_chunk_size:
+                    outfile.write(buf)
+                    buf.clear()
+                line = mm.readline()
+            outfile.write(buf)
 
     # Delete the original file.
     os.remove(mpname)
@@ -7,7 +7,8 @@ from matplotlib import pyplot as plt
 import numpy as np
 
 
-noise = np.random.randn(512, 256)
+rng = np.random.default_rng(4242)
+noise = rng.standard_normal((512, 256), dtype=np.float32)
 plt.imshow(noise, interpolation="nearest", aspect="auto")
 plt.colorbar()
 
@@ -7,7 +7,9 @@ from matplotlib import pyplot as plt
 import numpy as np
 
 
-noise = np.random.randn(512, 256) + 1j * np.random.randn(512, 256)
+rng = np.random.default_rng(4242)
+noise = rng.standard_normal((512, 256), dtype=np.float32)
+noise = noise + 1j * rng.standard_normal((512, 256), dtype=np.float32)
 plt.imshow(np.abs(noise) ** 2, interpolation="nearest", aspect="auto")
 plt.colorbar()
 
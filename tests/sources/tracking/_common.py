@@ -0,0 +1,33 @@
+"""Shared data and plotting for the tracking test scripts.
+
+This must only be imported after pgfutils.setup_figure() has been called so that the
+file trackers are installed before Matplotlib (and hence NumPy) is imported.
+
+"""
+
+import array
+import functools
+import math
+
+from matplotlib import pyplot as plt
+from matplotlib.lines import Line2D
+
+
+@functools.lru_cache(maxsize=None)
+def signal():
+    """Get the time and value arrays of the sine wave plotted by the scripts.
+
+    These are small enough that plain Python arrays are quicker to build than going
+    through NumPy.
+
+    """
+    t = array.array("d", (i / 20 for i in range(201)))
+    s = array.array("d", (math.sin(math.pi * x) for x in t))
+    return t, s
+
+
+def plot(t, s):
+    """Add a line to the current axes directly rather than through pyplot.plot()."""
+    ax = plt.gca()
+    ax.add_line(Line2D(t, s))
+    ax.autoscale_view()
@@ -3,22 +3,32 @@ from pgfutils import save, setup_figure
 
 setup_figure(width=1, height=0.4, extra_tracking="netCDF4")
 
-import matplotlib.pyplot as plt
+from _common import plot
 import netCDF4
 import numpy as np
 
 
-t = np.linspace(0, 1, 101)
+# Number of samples. This is also the (fixed) length of the dimension in the file.
+N = 101
+
+t = np.linspace(0, 1, N)
 s = np.sin(2 * np.pi * 3 * t)
 
 ds = netCDF4.Dataset("test_output.nc", "w")
-samples = ds.createDimension("sample", len(t))
-times = ds.createVariable("time", "f8", ("sample",))
-times[:] = t
-voltage = ds.createVariable("voltage", "f8", ("sample",))
-voltage[:] = s
+samples = ds.createDimension("sample", N)
+
+# Store each variable as a single compressed chunk. The data is plain floats with no
+# fill values or scaling, so skip the masked array handling and hand over a contiguous
+# array already in the type of the variable.
+opts = dict(chunksizes=(N,), zlib=True, complevel=1, shuffle=True)
+times = ds.createVariable("time", "f8", ("sample",), **opts)
+times.set_auto_maskandscale(False)
+times[:] = np.ascontiguousarray(t, dtype=times.dtype)
+voltage = ds.createVariable("voltage", "f8", ("sample",), **opts)
+voltage.set_auto_maskandscale(False)
+voltage[:] = np.ascontiguousarray(s, dtype=voltage.dtype)
 ds.close()
 
-plt.plot(t, s)
+plot(t, s)
 
 save()
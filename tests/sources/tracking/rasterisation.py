@@ -7,7 +7,11 @@ from matplotlib import pyplot as plt
 import numpy as np
 
 
-d = np.random.randn(128, 128)
-plt.imshow(d)
+rng = np.random.default_rng(4242)
+d = rng.standard_normal((128, 128), dtype=np.float32)
+
+# Normalise to 8 bit values once rather than leaving it to the image on each draw.
+d8 = ((d - d.min()) / np.ptp(d) * 255).astype(np.uint8)
+plt.imshow(d8, cmap="viridis", interpolation="nearest")
 
 save()
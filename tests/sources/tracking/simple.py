@@ -3,12 +3,10 @@ from pgfutils import save, setup_figure
 
 setup_figure(width=1, height=1)
 
-from matplotlib import pyplot as plt
-import numpy as np
+from _common import plot, signal
 
 
-t = np.linspace(0, 10, 201)
-s = np.sin(2 * np.pi * 0.5 * t)
+t, s = signal()
 
-plt.plot(t, s)
+plot(t, s)
 save()
@@ -3,17 +3,16 @@ from pgfutils import save, setup_figure
 
 setup_figure(width=1, height=1)
 
-from matplotlib import pyplot as plt
+from _common import plot, signal
 import numpy as np
 
 
-t = np.linspace(0, 10, 201)
-s = np.sin(2 * np.pi * 0.5 * t)
+t, s = signal()
 
-data = np.random.randn(100, 100)
+data = np.zeros((100, 100))
 
 with open("test.npy", "wb") as f:
     np.save(f, data)
 
-plt.plot(t, s)
+plot(t, s)
 save()
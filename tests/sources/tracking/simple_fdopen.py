@@ -6,24 +6,24 @@ setup_figure(width=1, height=1)
 import base64
 import os
 
-from matplotlib import pyplot as plt
-import numpy as np
+from _common import plot, signal
 
 
-t = np.linspace(0, 10, 201)
-s = np.sin(2 * np.pi * 0.5 * t)
+# A single pixel PNG image.
+PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+P+/HgAFhAJ/wlse"
+    "KgAAAABJRU5ErkJggg=="
+)
+
+t, s = signal()
 
 # This is only for testing purposes.
 # You shouldn't need to do this in a normal script!
 os.fdopen = _file_tracker(os.fdopen)
 
-fd = os.open("test_fdopen.png", os.O_WRONLY | os.O_CREAT)
+fd = os.open("test_fdopen.png", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
 with os.fdopen(fd, "wb") as f:
-    img = (
-        "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+P+/HgAFhAJ/wlse"
-        "KgAAAABJRU5ErkJggg=="
-    )
-    f.write(base64.b64decode(img))
+    f.write(PNG)
 
-plt.plot(t, s)
+plot(t, s)
 save()
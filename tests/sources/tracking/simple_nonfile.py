@@ -6,24 +6,24 @@ setup_figure(width=1, height=1)
 import base64
 import os
 
-from matplotlib import pyplot as plt
-import numpy as np
+from _common import plot, signal
 
 
-t = np.linspace(0, 10, 201)
-s = np.sin(2 * np.pi * 0.5 * t)
+# A single pixel PNG image.
+PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+P+/HgAFhAJ/wlseKg"
+    "AAAABJRU5ErkJggg=="
+)
+
+t, s = signal()
 
 # This is only for testing purposes.
 # You shouldn't need to do this in a normal script!
 os.open = _file_tracker(os.open)
 
-fd = os.open("test_nonfile.png", os.O_WRONLY | os.O_CREAT)
-img = (
-    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+P+/HgAFhAJ/wlseKg"
-    "AAAABJRU5ErkJggg=="
-)
-os.write(fd, base64.b64decode(img))
+fd = os.open("test_nonfile.png", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+os.write(fd, PNG)
 os.close(fd)
 
-plt.plot(t, s)
+plot(t, s)
 save()
@@ -7,12 +7,10 @@ import base64
 from pathlib import Path
 import tempfile
 
-from matplotlib import pyplot as plt
-import numpy as np
+from _common import plot, signal
 
 
-t = np.linspace(0, 10, 201)
-s = np.sin(2 * np.pi * 0.5 * t)
+t, s = signal()
 
 with open(Path(tempfile.gettempdir()) / "test_nonproject.png", "wb") as f:
     img = (
@@ -21,5 +19,5 @@ with open(Path(tempfile.gettempdir()) / "test_nonproject.png", "wb") as f:
     )
     f.write(base64.b64decode(img))
 
-plt.plot(t, s)
+plot(t, s)
 save()
@@ -1,69 +1,64 @@
+import itertools
+import re
+
 from matplotlib.colors import get_named_colors_mapping
 import pytest
 
-from pgfutils import ColorError, _config, _config_reset
+from pgfutils import ColorError, _config
+
+
+# All known Matplotlib color names.
+_NAMED_COLORS = tuple(get_named_colors_mapping())
+
+# Valid greyscale fractions.
+_GREYSCALE = (0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+# Expected error messages.
+_NOT_A_COLOR_RE = re.compile(r"could not interpret .+ as a color")
+_RANGE_RE = re.compile(r"must be in \[0, 1\]")
 
 
 class TestColorClass:
-    def test_greyscale(self):
+    # N.B., Matplotlib uses strings for greyscale.
+    @pytest.mark.parametrize("f", _GREYSCALE)
+    def test_greyscale(self, f):
         """Grayscale fraction parsing..."""
-        _config_reset()
-
-        # Test a range of valid floats.
-        # N.B., Matplotlib uses strings for greyscale.
-        for f in (0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0):
-            _config.read_kwargs(figure_background=f)
-            assert _config["pgfutils"].getcolor("figure_background") == str(f)
-
-        # The same things as strings.
-        for s in (
-            "0",
-            "0.1",
-            "0.2",
-            "0.3",
-            "0.4",
-            "0.5",
-            "0.6",
-            "0.7",
-            "0.8",
-            "0.9",
-            "1.0",
-        ):
-            _config.read_kwargs(figure_background=s)
-            assert _config["pgfutils"].getcolor("figure_background") == s
-
-        # Check numbers outside the valid range.
-        for f in (1.01, -1):
-            with pytest.raises(ColorError):
-                _config.read_kwargs(axes_background=f)
-                _config["pgfutils"].getcolor("axes_background")
+        _config.read_kwargs(figure_background=f)
+        assert _config["pgfutils"].getcolor("figure_background") == str(f)
+
+    @pytest.mark.parametrize("s", [str(f) for f in _GREYSCALE])
+    def test_greyscale_string(self, s):
+        """Grayscale fraction parsing from strings..."""
+        _config.read_kwargs(figure_background=s)
+        assert _config["pgfutils"].getcolor("figure_background") == s
+
+    @pytest.mark.parametrize("f", [1.01, -1])
+    def test_greyscale_range(self, f):
+        """Grayscale fraction parsing rejects numbers outside [0, 1]..."""
+        with pytest.raises(ColorError, match=_RANGE_RE):
+            _config.read_kwargs(axes_background=f)
+            _config["pgfutils"].getcolor("axes_background")
 
-    def test_named(self):
+    @pytest.mark.parametrize("color", _NAMED_COLORS)
+    def test_named(self, color):
         """Named color parsing..."""
-        _config_reset()
-
-        # Try all known Matplotlib colors.
-        for color in get_named_colors_mapping().keys():
-            _config.read_kwargs(axes_background=color)
-            assert _config["pgfutils"].getcolor("axes_background") == color
+        _config.read_kwargs(axes_background=color)
+        assert _config["pgfutils"].getcolor("axes_background") == color
 
-        # And check it rejects non-existent named colors.
-        with pytest.raises(ColorError):
+    def test_named_invalid(self):
+        """Named color parsing rejects unknown names..."""
+        with pytest.raises(ColorError, match=_NOT_A_COLOR_RE):
             _config.read_kwargs(axes_background="nonexistentuglycolor")
             _config["pgfutils"].getcolor("axes_background")
 
-    def test_cycle(self):
+    @pytest.mark.parametrize("cycle", [f"C{i:d}" for i in range(10)])
+    def test_cycle(self, cycle):
         """Color cycle parsing..."""
-        _config_reset()
-
-        for i in range(0, 10):
-            cycle = "C{0:d}".format(i)
-            _config.read_kwargs(axes_background=cycle)
-            assert _config["pgfutils"].getcolor("axes_background") == cycle
+        _config.read_kwargs(axes_background=cycle)
+        assert _config["pgfutils"].getcolor("axes_background") == cycle
 
     def test_transparent(self):
         """Color parsing supports transparency..."""
-        _config_reset()
         _config.read_kwargs(axes_background="none")
         assert _config["pgfutils"].getcolor("axes_background") == "none"
         _config.read_kwargs(axes_background="transparent")
@@ -73,24 +68,16 @@ class TestColorClass:
 
     def test_rgb(self):
         """RGB list/tuple color parsing..."""
-        _config_reset()
-
-        # Generate a set of valid colors. We have to include an alpha channel
-        # here as it is always returned from the parser with alpha=1.
-        import numpy as np
-
-        c = np.linspace(0, 1, 5)
-        a = (c * 0) + 1.0
-        colors = np.stack(np.meshgrid(c, c, c, a), -1).reshape(-1, 4)
-
-        # Check they are accepted. The parser always returns colors as tuples.
-        for color in colors:
-            list_c = list(color)
-            tuple_c = tuple(color)
-            _config.read_kwargs(figure_background=str(list_c[:-1]))
-            assert _config["pgfutils"].getcolor("figure_background") == tuple_c
-            _config.read_kwargs(axes_background=str(tuple_c[:-1]))
-            assert _config["pgfutils"].getcolor("axes_background") == tuple_c
+        # Generate a set of valid colors and check they are accepted. We have to
+        # include an alpha channel in the expected value as it is always returned from
+        # the parser with alpha=1. The parser always returns colors as tuples.
+        c = [i / 4 for i in range(5)]
+        for rgb in itertools.product(c, repeat=3):
+            expected = rgb + (1.0,)
+            _config.read_kwargs(figure_background=str(list(rgb)))
+            assert _config["pgfutils"].getcolor("figure_background") == expected
+            _config.read_kwargs(axes_background=str(rgb))
+            assert _config["pgfutils"].getcolor("axes_background") == expected
 
         # Check it fails on channels with invalid values.
         color = [0, 0, 0]
@@ -104,28 +91,20 @@ class TestColorClass:
 
         # And some invalid formats too.
         for value in ("fail", "yes", "no"):
-            with pytest.raises(ColorError):
+            with pytest.raises(ColorError, match=_NOT_A_COLOR_RE):
                 _config.read_kwargs(axes_background=value)
                 _config["pgfutils"].getcolor("axes_background")
 
     def test_rgba(self):
         """RGBA list/tuple color parsing..."""
-        _config_reset()
-
-        # Generate a set of valid colors.
-        import numpy as np
-
-        c = np.linspace(0, 1, 5)
-        colors = np.stack(np.meshgrid(c, c, c, c), -1).reshape(-1, 4)
-
-        # Check they are accepted. The parser always returns colors as tuples.
-        for color in colors:
-            list_c = list(color)
-            tuple_c = tuple(color)
-            _config.read_kwargs(figure_background=str(list_c))
-            assert _config["pgfutils"].getcolor("figure_background") == tuple_c
-            _config.read_kwargs(axes_background=str(tuple_c))
-            assert _config["pgfutils"].getcolor("axes_background") == tuple_c
+        # Generate a set of valid colors and check they are accepted. The parser always
+        # returns colors as tuples.
+        c = [i / 4 for i in range(5)]
+        for rgba in itertools.product(c, repeat=4):
+            _config.read_kwargs(figure_background=str(list(rgba)))
+            assert _config["pgfutils"].getcolor("figure_background") == rgba
+            _config.read_kwargs(axes_background=str(rgba))
+            assert _config["pgfutils"].getcolor("axes_background") == rgba
 
         # Check it fails on channels with invalid values.
         color = [0, 0, 0, 0]
@@ -139,13 +118,12 @@ class TestColorClass:
 
         # And some invalid formats too.
         for value in ("fail", "yes", "no"):
-            with pytest.raises(ColorError):
+            with pytest.raises(ColorError, match=_NOT_A_COLOR_RE):
                 _config.read_kwargs(axes_background=value)
                 _config["pgfutils"].getcolor("axes_background")
 
     def test_invalid_tuples(self):
         """Check RGB/RGBA parsing rejects tuples of invalid length..."""
-        _config_reset()
         with pytest.raises(ColorError):
             _config.read_kwargs(axes_background="(1,)")
             _config["pgfutils"].getcolor("axes_background")
@@ -3,10 +3,20 @@ from pathlib import Path
 import pytest
 from pytest import approx
 
-from pgfutils import DimensionError, _config, _config_reset
+from pgfutils import DimensionError, _config
 
 
-base = Path(__file__).parent
+srcdir = Path(__file__).parent / "sources"
+
+# Strings which are not valid dimensions: empty, unparseable, negative or with an
+# unknown unit.
+_INVALID_DIMENSIONS = ("", "     ", "cm1.2", "1.2.2cm", "-1.2", "-1.2cm", "1.2kg")
+
+
+def kwarg_dimension(value):
+    """Set the text width through a keyword argument and read it back in inches."""
+    _config.read_kwargs(text_width=value)
+    return _config["tex"].getdimension("text_width")
 
 
 class TestConfigClass:
@@ -14,20 +24,17 @@ class TestConfigClass:
 
     def test_kwargs_unknown(self):
         """Config parser rejects unknown keywords..."""
-        _config_reset()
         with pytest.raises(KeyError):
             _config.read_kwargs(unknown_keyword="yellow")
 
     def test_cfg_unknown(self):
         """Config parser rejects unknown options in config file..."""
-        _config_reset()
         with pytest.raises(KeyError):
-            _config.read(base / "sources" / "extra_options.cfg")
+            _config.read(srcdir / "extra_options.cfg")
 
     def test_cfg_rcparams(self):
         """Config parser allows rcParams in config file..."""
-        _config_reset()
-        _config.read(base / "sources" / "extra_rcparams.cfg")
+        _config.read(srcdir / "extra_rcparams.cfg")
         assert not _config["rcParams"].getboolean(
             "ytick.left"
         ), "ytick.left is incorrect"
@@ -35,75 +42,29 @@ class TestConfigClass:
 
     def test_cfg_unknown_rcparams(self):
         """Config parser rejects unknown options in file also containing rcParams..."""
-        _config_reset()
         with pytest.raises(KeyError):
-            _config.read(base / "sources" / "extra_options_rcparams.cfg")
+            _config.read(srcdir / "extra_options_rcparams.cfg")
 
-    def test_dim_unknown_unit(self):
-        """Dimension with unknown unit is rejected..."""
-        _config_reset()
+    @pytest.mark.parametrize("dim", _INVALID_DIMENSIONS + (None,))
+    def test_dimension_rejected(self, dim):
+        """Invalid dimension is rejected by the parser..."""
         with pytest.raises(DimensionError):
-            _config.parsedimension("1.2kg")
-        with pytest.raises(DimensionError):
-            _config.read_kwargs(text_width="1.2kg")
-            _config["tex"].getdimension("text_width")
+            _config.parsedimension(dim)
 
-    def test_dimension_empty(self):
-        """Dimension cannot be empty string..."""
-        _config_reset()
-        with pytest.raises(DimensionError):
-            _config.parsedimension("")
+    @pytest.mark.parametrize("dim", _INVALID_DIMENSIONS)
+    def test_dimension_rejected_kwarg(self, dim):
+        """Invalid dimension is rejected when given as a keyword argument..."""
         with pytest.raises(DimensionError):
-            _config.parsedimension("     ")
-        with pytest.raises(DimensionError):
-            _config.parsedimension(None)
-        with pytest.raises(DimensionError):
-            _config.read_kwargs(text_width="")
-            _config["tex"].getdimension("text_width")
-        with pytest.raises(DimensionError):
-            _config.read_kwargs(text_width="    ")
-            _config["tex"].getdimension("text_width")
-
-    def test_dimension_not_parsing(self):
-        """Dimension rejects invalid strings..."""
-        _config_reset()
-        with pytest.raises(DimensionError):
-            _config.parsedimension("cm1.2")
-        with pytest.raises(DimensionError):
-            _config.parsedimension("1.2.2cm")
-        with pytest.raises(DimensionError):
-            _config.read_kwargs(text_width="1.2.2cm")
-            _config["tex"].getdimension("text_width")
-        with pytest.raises(DimensionError):
-            _config.read_kwargs(text_width="cm1.2")
-            _config["tex"].getdimension("text_width")
+            kwarg_dimension(dim)
 
     def test_dimension_inches(self):
         """Dimensions without units are treated as inches..."""
-        _config_reset()
         assert _config.parsedimension("7") == approx(7)
         assert _config.parsedimension("2.7") == approx(2.7)
-        _config.read_kwargs(text_width="5")
-        assert _config["tex"].getdimension("text_width") == approx(5)
-        _config.read_kwargs(text_width="5.451")
-        assert _config["tex"].getdimension("text_width") == approx(5.451)
-
-    def test_dimension_negative(self):
-        """Negative dimensions are rejected..."""
-        _config_reset()
-        with pytest.raises(DimensionError):
-            _config.parsedimension("-1.2")
-        with pytest.raises(DimensionError):
-            _config.parsedimension("-1.2cm")
-        with pytest.raises(DimensionError):
-            _config.read_kwargs(text_width="-1.2")
-            _config["tex"].getdimension("text_width")
-        with pytest.raises(DimensionError):
-            _config.read_kwargs(text_width="-1.2cm")
-            _config["tex"].getdimension("text_width")
+        assert kwarg_dimension("5") == approx(5)
+        assert kwarg_dimension("5.451") == approx(5.451)
 
     def test_unknown_tracking_type(self):
         """Unknown tracking types are rejected..."""
-        _config_reset()
         with pytest.raises(ValueError):
             _config.in_tracking_dir("unknown", "file.txt")
@@ -1,35 +1,46 @@
 from pathlib import Path
 
-from pgfutils import PgfutilsParser, _config, _config_reset
+import pytest
 
+from pgfutils import PgfutilsParser, _config
 
-base_dir = Path(__file__).parent.parent.resolve()
+
+base_dir = Path(__file__).parents[1]
 share_dir = base_dir / "data" / "share" / "matplotlib-pgfutils"
 
 
+def to_dict(cfg):
+    """Convert a config object to a dictionary.
+
+    This also strips leading/trailing whitespace in the paths section as all options
+    can take multiline values. The raw section storage is used rather than going
+    through a proxy for each section; neither configuration used in these tests has
+    defaults or interpolated values, so the result is the same.
+
+    """
+    return {
+        section: (
+            {k: v.strip() for k, v in options.items()}
+            if section == "paths"
+            else dict(options)
+        )
+        for section, options in cfg._sections.items()
+    }
+
+
+@pytest.fixture(scope="module")
+def data_config():
+    """The configuration file in data/ as a dictionary, parsed once per module."""
+    # Note we use the base class read() method here to avoid some extra error checking
+    # in our custom parser which gets in the way of this test being accurately
+    # performed.
+    data = PgfutilsParser()
+    super(PgfutilsParser, data).read(share_dir / "pgfutils.cfg")
+    return to_dict(data)
+
+
 class TestDataClass:
-    def test_data_config(self):
+    def test_data_config(self, data_config):
         """Test default configuration in data/ is correct..."""
-        _config_reset()
-
-        # Helper function to convert a config object to a dictionary.
-        # This also strips leading/trailing whitespace in the paths section as
-        # all options can take multiline values.
-        def to_dict(cfg):
-            result = {}
-            for section in cfg.sections():
-                conv = dict(cfg[section])
-                if section == "paths":
-                    conv = {k: v.strip() for k, v in conv.items()}
-                result[section] = conv
-            return result
-
-        # Read the config file in data/.
-        # Note we use the base class read() method here to avoid some extra
-        # error checking in our custom parser which gets in the way of this
-        # test being accurately performed.
-        data = PgfutilsParser()
-        super(PgfutilsParser, data).read(share_dir / "pgfutils.cfg")
-
         # Compare to the default options.
-        assert to_dict(data) == to_dict(_config)
+        assert data_config == to_dict(_config)
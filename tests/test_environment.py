@@ -1,32 +1,40 @@
 from pathlib import Path
+import shutil
 
 from .utils import build_pypgf
 
 
-srcdir = Path(__file__).parent.resolve() / "sources" / "environment"
+srcdir = Path(__file__).parent / "sources" / "environment"
 
 
-def test_environment_set():
+def copy_source(name, tmp_path):
+    """Copy one of the source directories to a temporary directory to build in."""
+    dest = tmp_path / name
+    shutil.copytree(srcdir / name, dest)
+    return dest
+
+
+def test_environment_set(tmp_path):
     """Check environment variables can be set..."""
-    with build_pypgf(srcdir / "check_set", "basic.py") as res:
+    with build_pypgf(copy_source("check_set", tmp_path), "basic.py") as res:
         assert res.returncode == 0, "Environment variables not set correctly."
 
 
-def test_environment_override():
+def test_environment_override(tmp_path):
     """Check environment variables can override existing ones..."""
-    with build_pypgf(srcdir / "check_set", "override.py") as res:
+    with build_pypgf(copy_source("check_set", tmp_path), "override.py") as res:
         assert res.returncode == 0, "Environment variables not set correctly."
 
 
-def test_environment_repeated():
+def test_environment_repeated(tmp_path):
     """Check the last value of repeated environment variables is used..."""
-    with build_pypgf(srcdir / "repeated", "basic.py") as res:
+    with build_pypgf(copy_source("repeated", tmp_path), "basic.py") as res:
         assert res.returncode == 0, "Environment variables not set correctly."
 
 
-def test_environment_invalid():
+def test_environment_invalid(tmp_path):
     """Check invalid environment variable in configuration is rejected..."""
-    with build_pypgf(srcdir / "invalid", "basic.py") as res:
+    with build_pypgf(copy_source("invalid", tmp_path), "basic.py") as res:
         assert res.returncode != 0, "Configuration not rejected."
         assert (
             "Environment variables should be in the form" in res.stderr
@@ -1,3 +1,4 @@
+import importlib.util
 from pathlib import Path
 
 import pytest
@@ -7,21 +8,23 @@ from .utils import build_pypgf
 
 srcdir = Path(__file__).parent / "sources" / "external"
 
+# Only look for the packages here; the figure scripts import them in the child process.
+_HAS_CARTOPY = importlib.util.find_spec("cartopy") is not None
+_HAS_SEABORN = importlib.util.find_spec("seaborn") is not None
 
+
+@pytest.mark.skipif(not _HAS_CARTOPY, reason="cartopy not available for testing")
 def test_cartopy():
     """Check a cartopy figure can be generated..."""
-    pytest.importorskip("cartopy", reason="cartopy not available for testing")
-
     with build_pypgf(srcdir, "cartopy_figure.py") as res:
         assert (
             res.returncode == 0
         ), f"{srcdir / 'cartopy_figure.py'} could not be built."
 
 
+@pytest.mark.skipif(not _HAS_SEABORN, reason="seaborn not available for testing")
 def test_seaborn():
     """Check a seaborn figure can be generated..."""
-    pytest.importorskip("seaborn", reason="seaborn not available for testing")
-
     with build_pypgf(srcdir, "seaborn_figure.py") as res:
         if res.returncode != 0:
             # Due to an upstream Matplotlib bug.
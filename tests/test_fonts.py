@@ -3,7 +3,7 @@ from pathlib import Path
 from .utils import build_pypgf
 
 
-srcdir = Path(__file__).parent.resolve() / "sources" / "fonts"
+srcdir = Path(__file__).parent / "sources" / "fonts"
 
 
 def test_custom_font():
@@ -1,25 +1,92 @@
 import os
 from pathlib import Path
 
+from matplotlib import pyplot as plt
 import pytest
 
-from pgfutils import save, setup_figure
+import pgfutils
+from pgfutils import _config, add_dependencies, save, setup_figure
 
 from .utils import build_pypgf
 
 
 srcdir = Path(__file__).parent.parent
 
+# save() names the figure after the calling script, i.e., this file.
+figure_fn = Path(__file__).with_suffix(".pypgf")
+
 
 class TestMiscClass:
     def test_save_with_figure(self):
         """Test save() works when given an explicit figure instance..."""
         setup_figure(width=1, height=1)
-        from matplotlib import pyplot as plt
+        fig = plt.figure()
+        try:
+            save(fig)
+            assert figure_fn.is_file(), "Figure not saved next to the calling script."
+        finally:
+            figure_fn.unlink(missing_ok=True)
 
+    def test_save_crlf(self, monkeypatch):
+        """Test save() keeps CRLF line endings in the figure..."""
+        setup_figure(width=1, height=1)
         fig = plt.figure()
-        save(fig)
-        os.unlink("tests/test_misc.pypgf")
+
+        # Replace the Matplotlib output with a figure as written on Windows.
+        lines = [
+            "%% Creator: Matplotlib, PGF backend",
+            "%%   \\input{<filename>.pgf}",
+            "%%   \\usepackage{pgf}",
+            "%% Figures using additional raster images can only be included by",
+            "%%   \\import{<path to file>}{<filename>.pgf}",
+            "%%",
+            "\\begin{pgfpicture}",
+            "\\pgfimage{figure-img0.png}",
+            "\\end{pgfpicture}",
+        ]
+        data = ("\r\n".join(lines) + "\r\n").encode()
+        monkeypatch.setattr(fig, "savefig", lambda fn: Path(fn).write_bytes(data))
+
+        _config.read_kwargs(tikzpicture=True)
+        try:
+            save(fig)
+            output = figure_fn.read_bytes()
+        finally:
+            figure_fn.unlink(missing_ok=True)
+
+        # Every line should end in CRLF, with no bare CR or LF anywhere.
+        assert output.endswith(b"\r\n")
+        assert output.count(b"\r") == output.count(b"\r\n")
+        assert output.count(b"\n") == output.count(b"\r\n")
+
+        # And the modified lines should still be correct.
+        output_lines = output.decode().split("\r\n")
+        assert output_lines[0].startswith("%% Creator: Matplotlib, PGF backend v")
+        assert output_lines[1] == f"%%  Script: {Path(__file__).resolve()}"
+        assert "%%    \\usepackage{tikz}" in output_lines
+        assert "\\begin{tikzpicture}" in output_lines
+        assert "\\pgfimage{tests/figure-img0.png}" in output_lines
+
+    def test_save_tracking_file(self, tmp_path, monkeypatch):
+        """Test save() writes the tracked files as native text..."""
+        setup_figure(width=1, height=1)
+        fig = plt.figure()
+        monkeypatch.setattr(fig, "savefig", lambda fn: Path(fn).write_bytes(b"%%\n"))
+
+        # Start tracking to a file with a known set of dependencies.
+        tfn = tmp_path / "tracking.test.results"
+        monkeypatch.setenv("PGFUTILS_TRACK_FILES", str(tfn))
+        monkeypatch.setattr(pgfutils._file_tracker, "filenames", set())
+        add_dependencies("data.file", "other.file")
+
+        try:
+            save(fig)
+        finally:
+            figure_fn.unlink(missing_ok=True)
+
+        # The file should be text with native line endings.
+        expected = "r:data.file\nr:other.file"
+        assert tfn.read_bytes() == expected.replace("\n", os.linesep).encode()
 
     def test_save_with_nonfigure_fails(self):
         """Test save() fails when given a non-figure object..."""
@@ -33,18 +100,17 @@ class TestMiscClass:
         rfn = srcdir / "README.md"
         sfn = tmpdir / "readme.py"
 
-        # Extract the example from the README.
-        with open(rfn, "r") as readme, open(sfn, "w") as script:
-            in_script = False
-            for line in readme:
-                sline = line.rstrip()
-                if in_script:
-                    if sline == "```":
-                        break
-                    script.write(line)
-                else:
-                    if sline == "```python":
-                        in_script = True
+        # Extract the example from the README: everything between the opening of the
+        # first Python code block and the next closing fence.
+        text = rfn.read_text()
+        start = text.find("\n```python\n")
+        assert start != -1, "No Python example found in README."
+        start += len("\n```python\n")
+        end = text.find("\n```", start)
+        assert end != -1, "Python example in README has no closing fence."
+        end += 1
+        with open(sfn, "w") as script:
+            script.write(text[start:end])
 
         # Confirm it builds.
         with build_pypgf(tmpdir, "readme.py") as res:
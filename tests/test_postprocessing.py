@@ -1,144 +1,164 @@
+import mmap
 from pathlib import Path
 import re
 
+import pytest
 from pytest import approx
 
 from .utils import build_pypgf, build_tex
 
 
 srcdir = Path(__file__).parent / "sources"
+raster_dir = srcdir / "fix_raster_paths"
+tikz_dir = srcdir / "tikzpicture"
+legend_dir = srcdir / "legend"
+
+# The legend commands of interest in the PGF output. Since the legend figure disables
+# all other sources of writing, any text must be due to a legend entry, and only the
+# legend has a background.
+_LEGEND_RE = re.compile(
+    rb"(?P<text>\\pgftext.*\\fontsize\{(?P<size>[\d.]+)\})"
+    rb"|(?P<begin>\\begin\{pgfscope\})"
+    rb"|(?P<end>\\end\{pgfscope\})"
+    rb"|(?P<fill>\\definecolor\{currentfill\}.*)"
+    rb"|(?P<fillopacity>\\pgfsetfillopacity.*)"
+    rb"|(?P<stroke>\\definecolor\{currentstroke\}.*)"
+    rb"|(?P<strokeopacity>\\pgfsetstrokeopacity.*)"
+    rb"|(?P<linewidth>\\pgfsetlinewidth.*)"
+)
+_NUM_RE = re.compile(rb"[\d.]+")
+
+
+def _first_float(values):
+    """Convert the first of a list of numeric byte strings to a float."""
+    return float(values[0])
+
+
+def _float_list(values):
+    """Convert a list of numeric byte strings to a list of floats."""
+    return list(map(float, values))
+
+
+# How to convert the numbers found in each legend property command.
+_LEGEND_CONVERTERS = {
+    "fill": _float_list,
+    "fillopacity": _first_float,
+    "stroke": _float_list,
+    "strokeopacity": _first_float,
+    "linewidth": _first_float,
+}
 
 
 def test_fix_raster_paths():
     """Check fix_raster_paths works..."""
-    dir = srcdir / "fix_raster_paths"
+    with build_pypgf(raster_dir, "figures/noise.py") as res:
+        assert (
+            res.returncode == 0
+        ), f"Building {raster_dir / 'figures/noise.py'} failed."
 
-    with build_pypgf(dir, "figures/noise.py") as res:
-        assert res.returncode == 0, f"Building {dir / 'figures/noise.py'} failed."
+    with build_pypgf(raster_dir, "speckle.py") as res:
+        assert res.returncode == 0, f"Building {raster_dir / 'speckle.pypgf'} failed."
 
-    with build_pypgf(dir, "speckle.py") as res:
-        assert res.returncode == 0, f"Building {dir / 'speckle.pypgf'} failed."
-
-        with build_tex(dir, "document") as tex_res:
+        with build_tex(raster_dir, "document") as tex_res:
             assert (
                 tex_res.returncode == 0
             ), "Building tests/sources/fix_raster_paths/document.pdf failed."
 
 
-def test_tracking_fix_raster_paths():
+@pytest.mark.parametrize(
+    "script, expected",
+    [
+        ("figures/noise.py", {"w:figures/noise-img0.png", "w:figures/noise-img1.png"}),
+        ("speckle.py", {"w:speckle-img0.png", "w:speckle-img1.png"}),
+    ],
+    ids=["subdirectory", "top-level"],
+)
+def test_tracking_fix_raster_paths(script, expected):
     """Check file tracking works with fix_raster_paths..."""
-    dir = srcdir / "fix_raster_paths"
-
-    with build_pypgf(dir, "figures/noise.py", {"PGFUTILS_TRACK_FILES": "1"}) as res:
-        assert res.returncode == 0, f"Building {dir / 'figures/noise.py'} failed."
-        expected = {
-            "r:pgfutils.cfg",
-            "w:figures/noise-img0.png",
-            "w:figures/noise-img1.png",
-        }
-        actual = set(res.stdout.strip().splitlines())
-        assert actual == expected, "Tracked file mismatch."
-
-    with build_pypgf(dir, "speckle.py", {"PGFUTILS_TRACK_FILES": "1"}) as res:
-        assert res.returncode == 0, f"Building {dir / 'speckle.pypgf'} failed."
-        expected = {
-            "r:pgfutils.cfg",
-            "w:speckle-img0.png",
-            "w:speckle-img1.png",
-        }
+    with build_pypgf(raster_dir, script, {"PGFUTILS_TRACK_FILES": "1"}) as res:
+        assert res.returncode == 0, f"Building {raster_dir / script} failed."
         actual = set(res.stdout.strip().splitlines())
-        assert actual == expected, "Tracked file mismatch."
+        assert actual == {"r:pgfutils.cfg"} | expected, "Tracked file mismatch."
 
 
 def test_tikzpicture():
     """Check tikzpicture postprocessing works..."""
-    dir = srcdir / "tikzpicture"
-    with build_pypgf(dir, "square.py") as res:
-        assert res.returncode == 0, f"Building {dir / 'square.pypgf'} failed."
+    with build_pypgf(tikz_dir, "square.py") as res:
+        assert res.returncode == 0, f"Building {tikz_dir / 'square.pypgf'} failed."
 
-        with build_tex(dir, "document_pgf") as tex_res:
+        with build_tex(tikz_dir, "document_pgf") as tex_res:
             assert (
                 tex_res.returncode != 0
             ), "Document should have failed to built without the tikz package."
 
-        with build_tex(dir, "document_tikz") as tex_res:
+        with build_tex(tikz_dir, "document_tikz") as tex_res:
             assert (
                 tex_res.returncode == 0
             ), "Document failed to build with the tikz package."
 
 
-def test_legend_parameters():
+@pytest.fixture(scope="module")
+def legend_pypgf():
+    """Build the legend figure and map the output file into memory.
+
+    All the commands of interest are ASCII, so the file is scanned as bytes without
+    decoding it.
+
+    """
+    with build_pypgf(legend_dir, "legend_only.py") as res:
+        assert (
+            res.returncode == 0
+        ), f"Building {legend_dir / 'legend_only.pypgf'} failed."
+        with open(legend_dir / "legend_only.pypgf", "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield mm
+
+
+def test_legend_parameters(legend_pypgf):
     """Check legend parameters are set..."""
-    # Build the image.
-    dir = srcdir / "legend"
-
-    with build_pypgf(dir, "legend_only.py") as res:
-        assert res.returncode == 0, f"Building {dir / 'legend_only.pypgf'} failed."
-
-        # Go through and find some values of interest.
-        text_sizes = []
-        current_scope = []
-        found_legend_scope = False
-        legend_scope = None
-
-        with open(dir / "legend_only.pypgf", "r") as f:
-            for line in f:
-                line = line.strip()
-
-                # Text: since we've disabled all other sources of writing, this
-                # must be due to a legend entry.
-                if r"\pgftext" in line:
-                    text_sizes.extend(
-                        map(float, re.findall(r".+\\fontsize\{([\d.]+)}", line))
-                    )
-
-                # Start of a scope.
-                elif r"\begin{pgfscope}" in line:
-                    current_scope = []
-                    found_legend_scope = False
-
-                # End of a scope.
-                elif r"\end{pgfscope}" in line and found_legend_scope:
-                    legend_scope = list(current_scope)
-
-                # Only the legend contains a background.
-                elif r"\definecolor{currentfill}" in line:
-                    found_legend_scope = True
-
-                # Add the line to the current scope.
-                current_scope.append(line)
-
-        # Check the text sizes are correct.
-        assert text_sizes == approx([14, 14, 14]), "Legend font sizes are incorrect."
-
-        # No legend found.
-        if not legend_scope:
-            raise AssertionError("Could not find PGF scope containing legend.")
-
-        # Pull out properties set within the legend scope.
-        fill = []
-        fillopacity = -1
-        stroke = []
-        strokeopacity = -1
-        linewidth = -1
-        for line in legend_scope:
-            if r"\definecolor{currentfill}" in line:
-                fill = list(map(float, re.findall(r"[\d.]+", line)))
-            elif r"\pgfsetfillopacity" in line:
-                fillopacity = float(re.findall(r"[\d.]+", line)[0])
-            elif r"\definecolor{currentstroke}" in line:
-                stroke = list(map(float, re.findall(r"[\d.]+", line)))
-            elif r"\pgfsetstrokeopacity" in line:
-                strokeopacity = float(re.findall(r"[\d.]+", line)[0])
-            elif r"\pgfsetlinewidth" in line:
-                linewidth = float(re.findall(r"[\d.]+", line)[0])
-
-        # Now check the values are correct. Note the increased margin for the
-        # line size -- the output value often seems to be a wee way off the
-        # number. I'd guess this is due to some rounding in the exporter. At
-        # the end of the day 0.1 of a point is not that noticeable!
-        assert fill == approx([0, 0.5, 1]), "Legend background colour is wrong."
-        assert fillopacity == approx(0.7), "Legend background opacity is wrong."
-        assert stroke == approx([1, 0.5, 0]), "Legend border colour is wrong."
-        assert strokeopacity == approx(0.7), "Legend border opacity is wrong."
-        assert linewidth == approx(4, abs=0.1), "Legend border width is wrong."
+    # Go through and find the text sizes and the properties set within the scope
+    # containing the legend.
+    text_sizes = []
+    scope_props = {}
+    found_legend_scope = False
+    legend_props = None
+    for match in _LEGEND_RE.finditer(legend_pypgf):
+        kind = match.lastgroup
+        if kind == "text":
+            text_sizes.append(float(match["size"]))
+        elif kind == "begin":
+            scope_props = {}
+            found_legend_scope = False
+        elif kind == "end":
+            if found_legend_scope:
+                legend_props = dict(scope_props)
+        else:
+            found_legend_scope = found_legend_scope or kind == "fill"
+            scope_props[kind] = _LEGEND_CONVERTERS[kind](_NUM_RE.findall(match[0]))
+
+    # Check the text sizes are correct.
+    assert text_sizes == approx([14, 14, 14]), "Legend font sizes are incorrect."
+
+    # No legend found.
+    if legend_props is None:
+        raise AssertionError("Could not find PGF scope containing legend.")
+
+    # Any properties not set in the legend scope get an invalid value.
+    props = {
+        "fill": [],
+        "fillopacity": -1,
+        "stroke": [],
+        "strokeopacity": -1,
+        "linewidth": -1,
+    }
+    props.update(legend_props)
+
+    # Now check the values are correct. Note the increased margin for the
+    # line size -- the output value often seems to be a wee way off the
+    # number. I'd guess this is due to some rounding in the exporter. At
+    # the end of the day 0.1 of a point is not that noticeable!
+    assert props["fill"] == approx([0, 0.5, 1]), "Legend background colour is wrong."
+    assert props["fillopacity"] == approx(0.7), "Legend background opacity is wrong."
+    assert props["stroke"] == approx([1, 0.5, 0]), "Legend border colour is wrong."
+    assert props["strokeopacity"] == approx(0.7), "Legend border opacity is wrong."
+    assert props["linewidth"] == approx(4, abs=0.1), "Legend border width is wrong."
@@ -1,242 +1,230 @@
+import itertools
+import mmap
 from pathlib import Path
+import re
+from types import MappingProxyType, SimpleNamespace
 
-import matplotlib
-import numpy as np
+import pytest
 from pytest import approx, raises
 
-from pgfutils import _config, _config_reset, setup_figure
-
-from .utils import build_pypgf, in_directory
-
-
-base = Path(__file__).parent.resolve()
-
-
-class TestSetupFigureClass:
-    def test_setup_both_fractions(self):
-        """setup_figure() with both sizes fractions..."""
-        # Simple case.
-        _config_reset()
-        setup_figure(width=1, height=1)
-        w, h = matplotlib.rcParams["figure.figsize"]
-        assert w == _config["tex"].getdimension("text_width")
-        assert h == _config["tex"].getdimension("text_height")
-
-        # More complicated fractions.
-        for m in np.linspace(0.1, 2.1, 13):
-            for n in np.linspace(0.1, 2.1, 13):
-                _config_reset()
-                setup_figure(width=m, height=n)
-                w, h = matplotlib.rcParams["figure.figsize"]
-                assert w == approx(m * _config["tex"].getdimension("text_width"))
-                assert h == approx(n * _config["tex"].getdimension("text_height"))
-
-    def test_setup_both_dimensions(self):
-        """setup_figure() with both sizes specific dimensions..."""
-        # Dimensions and their size in inches.
-        dims = {
-            "1in": 1,
-            "2.5 inch": 2.5,
-            "3 inches": 3,
-            "2.54cm": 1,
-            "1 centimetre": 0.3937,
-            "8 centimetres": 3.14961,
-            "1.0 centimeter": 0.3937,
-            "8.0 centimeters": 3.14961,
-            "80mm": 3.14961,
-            "200 millimetre": 7.8740,
-            "123.4 millimetres": 4.8583,
-            "200 millimeter": 7.8740,
-            "123.4 millimeters": 4.8583,
-            "340pt": 4.7046,
-            "120point": 1.6604,
-            "960 points": 13.2835,
-        }
-
-        # Check each combination.
-        for wstr, winch in dims.items():
-            for hstr, hinch in dims.items():
-                _config_reset()
-                setup_figure(width=wstr, height=hstr)
-                w, h = matplotlib.rcParams["figure.figsize"]
-                assert w == approx(winch, rel=1e-3)
-                assert h == approx(hinch, rel=1e-3)
-
-    def test_setup_width_fraction(self):
-        """setup_figure() with width as a fraction and specific height..."""
-        # Dimensions and their size in inches.
-        dims = {
-            "1in": 1,
-            "2.5 inch": 2.5,
-            "3 inches": 3,
-            "2.54cm": 1,
-            "1 centimetre": 0.3937,
-            "8 centimetres": 3.14961,
-            "1.0 centimeter": 0.3937,
-            "8.0 centimeters": 3.14961,
-            "80mm": 3.14961,
-            "200 millimetre": 7.8740,
-            "123.4 millimetres": 4.8583,
-            "200 millimeter": 7.8740,
-            "123.4 millimeters": 4.8583,
-            "340pt": 4.7046,
-            "120point": 1.6604,
-            "960 points": 13.2835,
-        }
-
-        # Check various combinations.
-        for m in np.linspace(0.3, 2.5, 17):
-            for hstr, hinch in dims.items():
-                _config_reset()
-                setup_figure(width=m, height=hstr)
-                w, h = matplotlib.rcParams["figure.figsize"]
-                assert w == approx(m * _config["tex"].getdimension("text_width"))
-                assert h == approx(hinch, rel=1e-3)
-
-    def test_setup_height_fraction(self):
-        """setup_figure() with specific width and height as a fraction..."""
-        # Dimensions and their size in inches.
-        dims = {
-            "1in": 1,
-            "2.5 inch": 2.5,
-            "3 inches": 3,
-            "2.54cm": 1,
-            "1 centimetre": 0.3937,
-            "8 centimetres": 3.14961,
-            "1.0 centimeter": 0.3937,
-            "8.0 centimeters": 3.14961,
-            "80mm": 3.14961,
-            "200 millimetre": 7.8740,
-            "123.4 millimetres": 4.8583,
-            "200 millimeter": 7.8740,
-            "123.4 millimeters": 4.8583,
-            "340pt": 4.7046,
-            "120point": 1.6604,
-            "960 points": 13.2835,
-        }
-
-        # Check various combinations.
-        for wstr, winch in dims.items():
-            for n in np.linspace(0.3, 2.5, 17):
-                _config_reset()
-                setup_figure(width=wstr, height=n)
-                w, h = matplotlib.rcParams["figure.figsize"]
-                assert w == approx(winch, rel=1e-3)
-                assert h == approx(n * _config["tex"].getdimension("text_height"))
-
-    def test_kwargs_overrides(self):
-        """Test setup_figure() kwargs override configuration file..."""
-        dir = base / "sources" / "kwargs"
-
-        # Helper to parse a fill color from a pypgf file.
-        def get_fill_color(fn):
-            with open(fn, "r") as f:
-                for line in f:
-                    if "currentfill" not in line:
-                        continue
-                    line = line.replace(r"\definecolor{currentfill}{rgb}{", "")
-                    line = line.replace(r"}%", "")
-                    return tuple(map(float, line.split(",")))
-
-        # Check the default (pgfutils.cfg) fill color is in use.
-        with build_pypgf(dir, "default.py") as res:
-            assert res.returncode == 0, f"Failed to run {dir / 'default.py'}."
-            assert get_fill_color(dir / "default.pypgf") == approx(
-                (0, 0, 1)
-            ), "Default background fill should be blue, (0, 0, 1)."
-
-        # And now check we can override this using kwargs.
-        with build_pypgf(dir, "overridden.py") as res:
-            assert res.returncode == 0, f"Failed to run {dir / 'overridden.py'}."
-            assert get_fill_color("tests/sources/kwargs/overridden.pypgf") == approx(
-                (1, 0, 0)
-            ), "Overridden background fill should be red, (1, 0, 0)."
-
-    def test_kwargs_rejects_unknown(self):
-        """Test setup_figure() rejects unknown configuration options..."""
-        with raises(KeyError):
-            setup_figure(width=1, height=1, border_width=3)
-
-    def test_setup_margin(self):
-        """Test setup_figure() generates margin figures with margin=True..."""
+from pgfutils import PgfutilsParser, _config_defaults, setup_figure
+
+from .utils import build_pypgf_inprocess
+
+
+base = Path(__file__).parent
+kwargs_dir = base / "sources" / "kwargs"
+
+# Dimensions and their size in inches. This is shared by several parametrized tests,
+# so make it read-only.
+_DIMS = MappingProxyType(
+    {
+        "1in": 1,
+        "2.5 inch": 2.5,
+        "3 inches": 3,
+        "2.54cm": 1,
+        "1 centimetre": 0.3937,
+        "8 centimetres": 3.14961,
+        "1.0 centimeter": 0.3937,
+        "8.0 centimeters": 3.14961,
+        "80mm": 3.14961,
+        "200 millimetre": 7.8740,
+        "123.4 millimetres": 4.8583,
+        "200 millimeter": 7.8740,
+        "123.4 millimeters": 4.8583,
+        "340pt": 4.7046,
+        "120point": 1.6604,
+        "960 points": 13.2835,
+    }
+)
+
+# The expected figure size for each dimension.
+_DIMS_APPROX = MappingProxyType(
+    {dim: approx(inch, rel=1e-3) for dim, inch in _DIMS.items()}
+)
+
+# A fill color definition in the PGF output.
+_FILL_RE = re.compile(rb"\\definecolor\{currentfill\}\{rgb\}\{([^}]+)\}")
+
+# Fractions of the text size to test along with the dimensions.
+_FRACTIONS = tuple(0.3 + 2.2 * i / 16 for i in range(17))
+_FRACTION_IDS = [f"{f:.4g}" for f in _FRACTIONS]
+
+# Fractions to test for both sizes.
+_BOTH_FRACTIONS = tuple(0.1 + 2.0 * i / 12 for i in range(13))
+_BOTH_FRACTION_IDS = [f"{f:.4g}" for f in _BOTH_FRACTIONS]
+
+# Width and height fractions for margin and full-width figures.
+_MARGIN_FRACTIONS = tuple(itertools.product((1.0, 0.5, 1.2), (0.3, 0.25, 0.5)))
+_FULL_WIDTH_FRACTIONS = tuple(itertools.product((1.0, 0.75, 1.1), (0.4, 0.35, 0.15)))
+
+
+@pytest.fixture(scope="module")
+def tex():
+    """The default document dimensions in inches, parsed once for the module."""
+    cfg = PgfutilsParser()
+    cfg.read_dict(_config_defaults)
+    section = cfg["tex"]
+    dims = SimpleNamespace(
+        text_width=section.getdimension("text_width"),
+        text_height=section.getdimension("text_height"),
+        marginpar_width=section.getdimension("marginpar_width"),
+        marginpar_sep=section.getdimension("marginpar_sep"),
+    )
+    dims.full_width = dims.text_width + dims.marginpar_sep + dims.marginpar_width
+    return dims
+
+
+def _fill_color(fn):
+    """Get the first fill color defined in a pypgf file as an RGB tuple."""
+    with open(fn, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            match = _FILL_RE.search(mm)
+            return tuple(map(float, match[1].split(b",")))
+
+
+def _figsize():
+    """Get the figure size set by setup_figure().
+
+    Matplotlib is imported here rather than at the top of the module so that just
+    collecting these tests does not import it.
+
+    """
+    import matplotlib
+
+    return matplotlib.rcParams["figure.figsize"]
+
+
+def test_setup_full_text_size(tex):
+    """setup_figure() with both sizes a fraction of one..."""
+    setup_figure(width=1, height=1)
+    w, h = _figsize()
+    assert w == tex.text_width
+    assert h == tex.text_height
+
+
+@pytest.mark.parametrize("n", _BOTH_FRACTIONS, ids=_BOTH_FRACTION_IDS)
+@pytest.mark.parametrize("m", _BOTH_FRACTIONS, ids=_BOTH_FRACTION_IDS)
+def test_setup_both_fractions(tex, m, n):
+    """setup_figure() with both sizes fractions..."""
+    setup_figure(width=m, height=n)
+    w, h = _figsize()
+    assert w == approx(m * tex.text_width)
+    assert h == approx(n * tex.text_height)
+
+
+@pytest.mark.parametrize("hstr", _DIMS)
+@pytest.mark.parametrize("wstr", _DIMS)
+def test_setup_both_dimensions(wstr, hstr):
+    """setup_figure() with both sizes specific dimensions..."""
+    setup_figure(width=wstr, height=hstr)
+    w, h = _figsize()
+    assert w == _DIMS_APPROX[wstr]
+    assert h == _DIMS_APPROX[hstr]
+
+
+@pytest.mark.parametrize("hstr", _DIMS)
+@pytest.mark.parametrize("m", _FRACTIONS, ids=_FRACTION_IDS)
+def test_setup_width_fraction(tex, m, hstr):
+    """setup_figure() with width as a fraction and specific height..."""
+    setup_figure(width=m, height=hstr)
+    w, h = _figsize()
+    assert w == approx(m * tex.text_width)
+    assert h == _DIMS_APPROX[hstr]
+
+
+@pytest.mark.parametrize("n", _FRACTIONS, ids=_FRACTION_IDS)
+@pytest.mark.parametrize("wstr", _DIMS)
+def test_setup_height_fraction(tex, wstr, n):
+    """setup_figure() with specific width and height as a fraction..."""
+    setup_figure(width=wstr, height=n)
+    w, h = _figsize()
+    assert w == _DIMS_APPROX[wstr]
+    assert h == approx(n * tex.text_height)
+
+
+def test_kwargs_overrides():
+    """Test setup_figure() kwargs override configuration file..."""
+    # Check the default (pgfutils.cfg) fill color is in use. These scripts only need
+    # the configuration in their directory, so they can be run in this process.
+    with build_pypgf_inprocess(kwargs_dir, "default.py") as res:
+        assert res.returncode == 0, f"Failed to run {kwargs_dir / 'default.py'}."
+        assert _fill_color(kwargs_dir / "default.pypgf") == approx(
+            (0, 0, 1)
+        ), "Default background fill should be blue, (0, 0, 1)."
+
+    # And now check we can override this using kwargs.
+    with build_pypgf_inprocess(kwargs_dir, "overridden.py") as res:
+        assert res.returncode == 0, f"Failed to run {kwargs_dir / 'overridden.py'}."
+        assert _fill_color(kwargs_dir / "overridden.pypgf") == approx(
+            (1, 0, 0)
+        ), "Overridden background fill should be red, (1, 0, 0)."
+
+
+def test_kwargs_rejects_unknown():
+    """Test setup_figure() rejects unknown configuration options..."""
+    with raises(KeyError):
+        setup_figure(width=1, height=1, border_width=3)
+
+
+@pytest.mark.parametrize("w_in, h_in", _MARGIN_FRACTIONS)
+def test_setup_margin(tex, w_in, h_in):
+    """Test setup_figure() generates margin figures with margin=True..."""
+    setup_figure(width=w_in, height=h_in, margin=True)
+    w, h = _figsize()
+    assert w == approx(w_in * tex.marginpar_width)
+    assert h == approx(h_in * tex.text_height)
+
+
+def test_setup_margin_dimensions():
+    """Test setup_figure() generates margin figures of a specific size..."""
+    setup_figure(width="1.8in", height="1.2in", margin=True)
+    w, h = _figsize()
+    assert w == approx(1.8)
+    assert h == approx(1.2)
+
+
+@pytest.mark.parametrize("w_in, h_in", _FULL_WIDTH_FRACTIONS)
+def test_setup_full_width(tex, w_in, h_in):
+    """Test setup_figure() generates full-width figures with full_width=True..."""
+    setup_figure(width=w_in, height=h_in, full_width=True)
+    w, h = _figsize()
+    assert w == approx(w_in * tex.full_width)
+    assert h == approx(h_in * tex.text_height)
+
+
+def test_setup_full_width_dimensions():
+    """Test setup_figure() generates full-width figures of a specific size..."""
+    setup_figure(width="5.5in", height="3.6in", full_width=True)
+    w, h = _figsize()
+    assert w == approx(5.5)
+    assert h == approx(3.6)
+
+
+def test_setup_arg_priority(tex):
+    """Test priority of columns/margin/full_width arguments to setup_figure()..."""
+    # All three: full width should take priority.
+    setup_figure(width=1, height=0.4, columns=1, margin=True, full_width=True)
+    w, h = _figsize()
+    assert w == approx(tex.full_width)
+    assert h == approx(0.4 * tex.text_height)
+
+    # Margin and full width: full width should take priority.
+    setup_figure(width=1, height=0.4, margin=True, full_width=True)
+    w, h = _figsize()
+    assert w == approx(tex.full_width)
+    assert h == approx(0.4 * tex.text_height)
+
+    # Margin and columns: margin should take priority.
+    setup_figure(width=1, height=0.4, columns=1, margin=True)
+    w, h = _figsize()
+    assert w == approx(tex.marginpar_width)
+    assert h == approx(0.4 * tex.text_height)
+
+
+def test_setup_pgfutilscfg_not_file(tmp_path, monkeypatch):
+    """Check setup_figure() errors if pgfutils.cfg exists but is not a file..."""
+    (tmp_path / "pgfutils.cfg").mkdir()
+    monkeypatch.chdir(tmp_path)
+    with raises(RuntimeError, match="exists but is not a file"):
         setup_figure()
-        margin = _config["tex"].getdimension("marginpar_width")
-        height = _config["tex"].getdimension("text_height")
-
-        # Fractional tests.
-        for w_in in {1.0, 0.5, 1.2}:
-            for h_in in {0.3, 0.25, 0.5}:
-                _config_reset()
-                setup_figure(width=w_in, height=h_in, margin=True)
-                w, h = matplotlib.rcParams["figure.figsize"]
-                assert w == approx(w_in * margin)
-                assert h == approx(h_in * height)
-
-        # Specific size.
-        _config_reset()
-        setup_figure(width="1.8in", height="1.2in", margin=True)
-        w, h = matplotlib.rcParams["figure.figsize"]
-        assert w == approx(1.8)
-        assert h == approx(1.2)
-
-    def test_setup_full_width(self):
-        """Test setup_figure() generates full-width figures with full_width=True..."""
-        setup_figure()
-        text = _config["tex"].getdimension("text_width")
-        sep = _config["tex"].getdimension("marginpar_sep")
-        margin = _config["tex"].getdimension("marginpar_width")
-        full = text + sep + margin
-        height = _config["tex"].getdimension("text_height")
-
-        # Fractional tests.
-        for w_in in {1.0, 0.75, 1.1}:
-            for h_in in {0.4, 0.35, 0.15}:
-                _config_reset()
-                setup_figure(width=w_in, height=h_in, full_width=True)
-                w, h = matplotlib.rcParams["figure.figsize"]
-                assert w == approx(w_in * full)
-                assert h == approx(h_in * height)
-
-        # Specific size.
-        _config_reset()
-        setup_figure(width="5.5in", height="3.6in", full_width=True)
-        w, h = matplotlib.rcParams["figure.figsize"]
-        assert w == approx(5.5)
-        assert h == approx(3.6)
-
-    def test_setup_arg_priority(self):
-        """Test priority of columns/margin/full_width arguments to setup_figure()..."""
-        setup_figure()
-        text = _config["tex"].getdimension("text_width")
-        sep = _config["tex"].getdimension("marginpar_sep")
-        margin = _config["tex"].getdimension("marginpar_width")
-        full = text + sep + margin
-        height = _config["tex"].getdimension("text_height")
-
-        # All three: full width should take priority.
-        _config_reset()
-        setup_figure(width=1, height=0.4, columns=1, margin=True, full_width=True)
-        w, h = matplotlib.rcParams["figure.figsize"]
-        assert w == approx(full)
-        assert h == approx(0.4 * height)
-
-        # Margin and full width: full width should take priority.
-        _config_reset()
-        setup_figure(width=1, height=0.4, margin=True, full_width=True)
-        w, h = matplotlib.rcParams["figure.figsize"]
-        assert w == approx(full)
-        assert h == approx(0.4 * height)
-
-        # Margin and columns: margin should take priority.
-        _config_reset()
-        setup_figure(width=1, height=0.4, columns=1, margin=True)
-        w, h = matplotlib.rcParams["figure.figsize"]
-        assert w == approx(margin)
-        assert h == approx(0.4 * height)
-
-    def test_setup_pgfutilscfg_not_file(self, tmpdir):
-        """Check setup_figure() errors if pgfutils.cfg exists but is not a file..."""
-        tmpdir.mkdir("pgfutils.cfg")
-        with in_directory(Path(tmpdir)):
-            with raises(RuntimeError, match="exists but is not a file"):
-                setup_figure()
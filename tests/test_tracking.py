@@ -1,4 +1,6 @@
+import importlib.util
 from pathlib import Path
+import sys
 import tempfile
 
 import pytest
@@ -11,6 +13,12 @@ from .utils import build_pypgf
 srcdir = Path(__file__).parent / "sources" / "tracking"
 
 
+@pytest.fixture
+def tfn(tmp_path):
+    """A file for the tracking results, unique to each test."""
+    return tmp_path / "tracking.test.results"
+
+
 class TestTrackingClass:
     def test_simple_stdout(self):
         """File tracking to stdout with no dependencies or rasterisation..."""
@@ -28,10 +36,9 @@ class TestTrackingClass:
             assert res.returncode == 0
             assert len(res.stderr.strip()) == 0
 
-    def test_simple_file(self):
+    def test_simple_file(self, tfn):
         """File tracking to file with no dependencies or rasterisation..."""
         # Run the script and check no files were reported.
-        tfn = srcdir / "tracking.test.results"
         env = {"PGFUTILS_TRACK_FILES": str(tfn)}
         with build_pypgf(srcdir, "simple.py", env) as res:
             assert res.returncode == 0
@@ -60,10 +67,9 @@ class TestTrackingClass:
             fn = "rasterisation-img0.png"
             assert res.stderr.strip() == "w:" + fn
 
-    def test_rasterisation_file(self):
+    def test_rasterisation_file(self, tfn):
         """File tracking to file with rasterised image..."""
         # Run the script.
-        tfn = srcdir / "tracking.test.results"
         env = {"PGFUTILS_TRACK_FILES": str(tfn)}
         with build_pypgf(srcdir, "rasterisation.py", env) as res:
             assert res.returncode == 0
@@ -95,10 +101,9 @@ class TestTrackingClass:
             fn = "scatter.csv"
             assert res.stderr.strip() == "r:" + fn
 
-    def test_loadtxt_file(self):
+    def test_loadtxt_file(self, tfn):
         """File tracking to file with loadtxt dependency..."""
         # Run the script.
-        tfn = srcdir / "tracking.test.results"
         env = {"PGFUTILS_TRACK_FILES": str(tfn)}
         with build_pypgf(srcdir, "dependency_loadtxt.py", env) as res:
             assert res.returncode == 0
@@ -130,10 +135,9 @@ class TestTrackingClass:
             fn = "scatter.csv"
             assert res.stderr.strip() == "r:" + fn
 
-    def test_pathlib_file(self):
+    def test_pathlib_file(self, tfn):
         """File tracking to file with pathlib dependency..."""
         # Run the script.
-        tfn = srcdir / "tracking.test.results"
         env = {"PGFUTILS_TRACK_FILES": str(tfn)}
         with build_pypgf(srcdir, "dependency_pathlib.py", env) as res:
             assert res.returncode == 0
@@ -165,10 +169,9 @@ class TestTrackingClass:
             fn = "noise.npy"
             assert res.stderr.strip() == "r:" + fn
 
-    def test_load_file(self):
+    def test_load_file(self, tfn):
         """File tracking to file with NumPy format dependency..."""
         # Run the script.
-        tfn = srcdir / "tracking.test.results"
         env = {"PGFUTILS_TRACK_FILES": str(tfn)}
         with build_pypgf(srcdir, "dependency_npy.py", env) as res:
             assert res.returncode == 0
@@ -214,10 +217,9 @@ class TestTrackingClass:
             actual = set(res.stderr.strip().splitlines())
             assert actual == expected
 
-    def test_multi_file(self):
+    def test_multi_file(self, tfn):
         """File tracking to file with multiple dependencies and rasterisation..."""
         # Run the script.
-        tfn = srcdir / "tracking.test.results"
         env = {"PGFUTILS_TRACK_FILES": str(tfn)}
         with build_pypgf(srcdir, "multi.py", env) as res:
             assert res.returncode == 0
@@ -276,11 +278,10 @@ class TestTrackingClass:
             actual = set(res.stderr.strip().splitlines())
             assert actual == expected
 
-    def test_extradirs_file(self):
+    def test_extradirs_file(self, tfn):
         """File tracking to file with extra dependency directories."""
         # Run the script.
         extra_dir = srcdir / "extra_dirs"
-        tfn = srcdir / "tracking.test.results"
         env = {"PGFUTILS_TRACK_FILES": str(tfn)}
         with build_pypgf(extra_dir, "multi.py", env) as res:
             assert res.returncode == 0
@@ -396,9 +397,8 @@ class TestTrackingClass:
                 actual = set(res.stderr.strip().splitlines())
                 assert actual == expected
 
-    def test_manual_file(self):
+    def test_manual_file(self, tfn):
         """File tracking to file with manual dependencies..."""
-        tfn = srcdir / "tracking.test.results"
         env = {"PGFUTILS_TRACK_FILES": str(tfn)}
         tests = {
             "manual_dependency.py": {"r:data.file"},
@@ -427,6 +427,57 @@ class TestTrackingClass:
             with pytest.raises(ValueError):
                 pgfutils._install_extra_file_trackers(["netCDF4", "unknown"])
 
+    def test_netcdf4_probed_before_import(self, tmp_path, monkeypatch):
+        """netCDF4 tracking still works if the module is looked for before import..."""
+        # A stand-in for netCDF4 so this runs without it installed. The import system
+        # state is restored afterwards so the real module (if any) is unaffected.
+        pkg = tmp_path / "netCDF4"
+        pkg.mkdir()
+        (pkg / "__init__.py").write_text(
+            "class Dataset:\n"
+            "    def __init__(self, filename, mode='r', **kwargs):\n"
+            "        pass\n"
+            "\n"
+            "class MFDataset:\n"
+            "    def __init__(self, files, *args, **kwargs):\n"
+            "        pass\n"
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(sys, "meta_path", list(sys.meta_path))
+        monkeypatch.setattr(pgfutils._file_tracker, "filenames", set())
+        original = sys.modules.pop("netCDF4", None)
+
+        try:
+            # Install the tracker alongside the import tracker, as setup_figure() does.
+            sys.meta_path.insert(0, pgfutils.ImportTracker())
+            pgfutils._install_extra_file_trackers(["netcdf4"])
+
+            # Libraries often check whether optional dependencies are available.
+            assert importlib.util.find_spec("netCDF4") is not None
+
+            import netCDF4
+
+            netCDF4.Dataset("data.nc")
+            netCDF4.MFDataset(["mf0.nc", "mf1.nc"])
+
+            # Each class should have been wrapped exactly once, and the hook removed.
+            assert netCDF4.Dataset.__bases__[0].__module__ == "netCDF4"
+            assert netCDF4.MFDataset.__bases__[0].__module__ == "netCDF4"
+            assert not any(
+                isinstance(finder, pgfutils.PostImportHook) for finder in sys.meta_path
+            )
+            assert pgfutils._list_opened_files() == [
+                ("r", Path("data.nc")),
+                ("r", Path("mf0.nc")),
+                ("r", Path("mf1.nc")),
+            ]
+
+        finally:
+            sys.modules.pop("netCDF4", None)
+            if original is not None:
+                sys.modules["netCDF4"] = original
+
     def test_netcdf4_setup(self):
         """File tracking with netCDF4 library enabled in setup()..."""
         pytest.importorskip("netCDF4", reason="netCDF4 not installed; cannot test.")
@@ -0,0 +1,56 @@
+import builtins
+import io
+import os
+import pathlib
+import sys
+
+import matplotlib
+
+import pgfutils
+
+from .utils import build_pypgf_inprocess
+
+
+def test_inprocess_build_restores_state(tmp_path):
+    """Test in-process figure builds do not change the state of later tests..."""
+    # A configuration which changes as much global state as possible.
+    (tmp_path / "pgfutils.cfg").write_text(
+        "[pgfutils]\n"
+        "environment =\n"
+        "    PGFUTILS_TEST_INPROCESS=1\n"
+        "    PGFUTILS_TRACK_FILES=1\n"
+        "\n"
+        "[paths]\n"
+        "pythonpath = extra_dir\n"
+    )
+    (tmp_path / "figure.py").write_text(
+        "from pgfutils import save, setup_figure\n"
+        "\n"
+        "setup_figure(width=1, height=1)\n"
+        "save()\n"
+    )
+
+    # The opener used by pathlib is only wrapped before Python 3.11.
+    accessor = getattr(pathlib, "_normal_accessor", None)
+    accessor_attrs = dict(vars(accessor)) if accessor is not None else None
+
+    backend = matplotlib.get_backend()
+    environ = dict(os.environ)
+    path = list(sys.path)
+    meta_path = list(sys.meta_path)
+    opens = (builtins.open, io.open)
+    config = {s: dict(pgfutils._config.items(s)) for s in pgfutils._config.sections()}
+
+    with build_pypgf_inprocess(tmp_path, "figure.py") as res:
+        assert res.returncode == 0, f"Failed to run {tmp_path / 'figure.py'}."
+
+    assert matplotlib.get_backend() == backend
+    assert dict(os.environ) == environ
+    assert sys.path == path
+    assert sys.meta_path == meta_path
+    assert (builtins.open, io.open) == opens
+    if accessor is not None:
+        assert vars(accessor) == accessor_attrs
+    assert {
+        s: dict(pgfutils._config.items(s)) for s in pgfutils._config.sections()
+    } == config
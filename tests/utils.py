@@ -1,8 +1,13 @@
-from contextlib import contextmanager
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+import functools
+import io
 import os
 from pathlib import Path
+import runpy
 import subprocess
 import sys
+import traceback
+from types import SimpleNamespace
 
 
 def clean_directory(path, mode="all"):
@@ -29,6 +34,12 @@ def clean_directory(path, mode="all"):
                 fn.unlink()
 
 
+@functools.lru_cache(maxsize=None)
+def _resolved_paths(paths):
+    """Resolve a tuple of paths, caching the result as sys.path rarely changes."""
+    return [str(Path(p).resolve()) for p in paths]
+
+
 @contextmanager
 def build_pypgf(figure_dir, filename, environment=None):
     """Build a .pypgf figure from a script.
@@ -59,7 +70,7 @@ def build_pypgf(figure_dir, filename, environment=None):
     # Get any specified paths and add all paths in this process.
     environment = environment or {}
     paths = environment.pop("PYTHONPATH", "").split(":")
-    paths.extend(str(Path(p).resolve()) for p in sys.path)
+    paths.extend(_resolved_paths(tuple(sys.path)))
 
     # Generate the sub-environment.
     env = dict(os.environ)
@@ -88,12 +99,121 @@ def build_pypgf(figure_dir, filename, environment=None):
         clean_directory(figure_dir, mode="pypgf")
 
 
+@contextmanager
+def _preserved_state():
+    """Restore global state changed by a figure script once it has run in-process.
+
+    Running setup_figure() and save() changes more than Matplotlib's rcParams: the
+    backend is switched to PGF, the configuration can set environment variables and add
+    to sys.path, file tracking wraps the standard open functions (and, before Python
+    3.11, the opener used by pathlib) and adds an import hook, and pgfutils keeps its
+    configuration and tracked files in module globals. All of these are saved on entry
+    and put back on exit so later tests are not affected.
+
+    """
+    import builtins
+    import pathlib
+
+    import matplotlib
+    from matplotlib import pyplot as plt
+
+    import pgfutils
+
+    backend = matplotlib.get_backend()
+    environ = dict(os.environ)
+    path = list(sys.path)
+    meta_path = list(sys.meta_path)
+    opens = (builtins.open, io.open)
+    accessor = getattr(pathlib, "_normal_accessor", None)
+    accessor_attrs = dict(vars(accessor)) if accessor is not None else None
+    config = {
+        section: dict(pgfutils._config.items(section, raw=True))
+        for section in pgfutils._config.sections()
+    }
+    filenames = set(pgfutils._file_tracker.filenames)
+    interactive = pgfutils._interactive
+
+    try:
+        with matplotlib.rc_context():
+            yield
+    finally:
+        plt.close("all")
+        if matplotlib.get_backend() != backend:
+            plt.switch_backend(backend)
+        os.environ.clear()
+        os.environ.update(environ)
+        sys.path[:] = path
+        sys.meta_path[:] = meta_path
+        builtins.open, io.open = opens
+        if accessor is not None:
+            vars(accessor).clear()
+            vars(accessor).update(accessor_attrs)
+        pgfutils._config.clear()
+        pgfutils._config.read_dict(config)
+        pgfutils._file_tracker.filenames = filenames
+        pgfutils._interactive = interactive
+
+
+@contextmanager
+def build_pypgf_inprocess(figure_dir, filename):
+    """Build a .pypgf figure by running a script within the test process.
+
+    This avoids starting a new interpreter (and importing Matplotlib again) for scripts
+    which do not need an isolated environment. Any global state the script changes
+    (Matplotlib's rcParams and backend, the environment, sys.path and the state of
+    pgfutils itself) is restored and any figures closed before the result is yielded,
+    and the figure and any related files are removed as for build_pypgf().
+
+    Parameters
+    ----------
+    figure_dir : path-like
+        Directory containing the script. The script is run with this as the working
+        directory, and the output will be placed in this directory also.
+    filename : string
+        The name of the script within the given directory.
+
+    Yields
+    ------
+    result : types.SimpleNamespace
+        An object with the same returncode, stdout and stderr attributes as the result
+        yielded by build_pypgf(). If the script raised an exception, the returncode is 1
+        and the traceback is included in stderr.
+
+    """
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    returncode = 0
+
+    # Run the script.
+    with _preserved_state(), in_directory(figure_dir):
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                runpy.run_path(str(Path(figure_dir) / filename), run_name="__main__")
+            except Exception:
+                traceback.print_exc()
+                returncode = 1
+    res = SimpleNamespace(
+        returncode=returncode, stdout=stdout.getvalue(), stderr=stderr.getvalue()
+    )
+
+    # Echo the output streams.
+    sys.stdout.write(res.stdout)
+    sys.stdout.flush()
+    sys.stderr.write(res.stderr)
+    sys.stderr.flush()
+
+    # Pass the result to the user, and clean up afterwards.
+    try:
+        yield res
+    finally:
+        clean_directory(figure_dir, mode="pypgf")
+
+
 @contextmanager
 def build_tex(doc_dir, basename, tex="xelatex"):
     """Attempt to build a PDF document from a TeX file.
 
     This context manager will remove the PDF and any auxiliary TeX files when it exits.
-    PNGs) when it exits.
 
     Parameters
     ----------
@@ -109,19 +229,26 @@ def build_tex(doc_dir, basename, tex="xelatex"):
     ------
     subprocess.CompletedProcess
         The result of the sub-process used to run TeX. The returncode attribute
-        indicates the exit status of the process, while the stdout and stderr attribute
-        have strings captured the corresponding stream. These streams are echoed to the
-        main process streams.
+        indicates the exit status of the process. The output streams of TeX are
+        discarded as they can be large; instead, the log file written by TeX is echoed
+        to the main process stdout if the build fails.
 
     """
-    # Run TeX.
-    res = subprocess.run([tex, basename], capture_output=True, text=True, cwd=doc_dir)
+    # Run TeX. It is run in non-stop mode so an error cannot leave it waiting for input.
+    res = subprocess.run(
+        [tex, "-interaction=nonstopmode", basename],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        cwd=doc_dir,
+    )
 
-    # Echo the output streams.
-    sys.stdout.write(res.stdout)
-    sys.stdout.flush()
-    sys.stderr.write(res.stderr)
-    sys.stderr.flush()
+    # Echo the log if the build failed.
+    if res.returncode != 0:
+        log = Path(doc_dir) / f"{basename}.log"
+        if log.is_file():
+            sys.stdout.write(log.read_text(errors="replace"))
+            sys.stdout.flush()
 
     # Pass the result to the user, and clean up afterwards.
     try: